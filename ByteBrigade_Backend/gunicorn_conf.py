@@ -0,0 +1,50 @@
+"""
+gunicorn configuration with a warm start:
+
+    gunicorn -c python:ByteBrigade_Backend.gunicorn_conf
+
+The master imports the Django app once (preload_app) and runs the
+database-free warm-up before forking workers, which share it copy-on-write.
+Each worker then opens its own database connections and warms the Skill
+table, hot serializers and availability filter before it accepts its first
+request; /api/health/ready/ turns 200 once that is done.
+
+Workers are threaded (gthread): each serves GUNICORN_THREADS requests at
+once, which is what the per-process admission gates in
+settings.ADMISSION_CONTROL are sized against. Django connections are per
+thread, so the warm-up also opens one on each of the worker's request
+threads; the first request a thread serves doesn't pay the connect.
+
+PORT, WEB_CONCURRENCY, GUNICORN_THREADS and GUNICORN_TIMEOUT override the
+defaults.
+"""
+import multiprocessing
+import os
+
+wsgi_app = 'ByteBrigade_Backend.wsgi:application'
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 10))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+preload_app = True
+
+
+def when_ready(server):
+    # Master, app already imported, no workers yet.
+    from ByteBrigade_Backend import warmup
+
+    warmup.prepare()
+    server.log.info(f"Master warm-up done: {warmup.state['steps']}")
+
+
+def post_worker_init(worker):
+    # Worker, after fork and before its accept loop.
+    from ByteBrigade_Backend import warmup
+
+    steps = warmup.warm(worker.wsgi, notify=worker.notify, executor=worker.tpool, threads=worker.cfg.threads)
+    if warmup.state['ready']:
+        worker.log.info(f"Worker {worker.pid} warm: {steps}")
+    else:
+        # Serve anyway; /api/health/ready/ reports 503 and retries.
+        worker.log.warning(f"Worker {worker.pid} warm-up failed: {warmup.state['error']}")
@@ -0,0 +1,159 @@
+import random
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.module_loading import import_string
+
+from . import profiling, routers
+
+
+class BrowserOnlyMiddleware:
+    """
+    Runs settings.BROWSER_MIDDLEWARE (sessions, CSRF, auth, messages,
+    clickjacking) for everything except the JSON API.
+
+    Requests under settings.API_PATH_PREFIX go straight to the view, so the
+    API doesn't pay for session lookups or cookie handling it never uses.
+    The admin and other browser pages get the full stack as before.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.api_prefix = getattr(settings, 'API_PATH_PREFIX', '/api/')
+
+        # Build the inner chain the same way BaseHandler.load_middleware does,
+        # keeping the view/exception/template hooks so we can replay them.
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+
+        handler = get_response
+        for middleware_path in reversed(settings.BROWSER_MIDDLEWARE):
+            middleware = import_string(middleware_path)(handler)
+            if hasattr(middleware, 'process_view'):
+                self._view_middleware.insert(0, middleware.process_view)
+            if hasattr(middleware, 'process_template_response'):
+                self._template_response_middleware.append(middleware.process_template_response)
+            if hasattr(middleware, 'process_exception'):
+                self._exception_middleware.append(middleware.process_exception)
+            handler = convert_exception_to_response(middleware)
+
+        self._browser_chain = handler
+
+    def is_api_request(self, request):
+        return request.path_info.startswith(self.api_prefix)
+
+    def __call__(self, request):
+        if self.is_api_request(request):
+            return self.get_response(request)
+        return self._browser_chain(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_api_request(request):
+            return None
+        for hook in self._view_middleware:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_template_response(self, request, response):
+        if self.is_api_request(request):
+            return response
+        for hook in self._template_response_middleware:
+            response = hook(request, response)
+        return response
+
+    def process_exception(self, request, exception):
+        if self.is_api_request(request):
+            return None
+        for hook in self._exception_middleware:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets PrimaryReplicaRouter send safe API reads to a read replica.
+
+    A request that writes gets a short-lived cookie back; while the client
+    holds it, its reads go to the primary, so it sees its own writes even if
+    the replicas are behind. Admin and other non-API requests always use
+    the primary.
+
+    The frontend is on another site, so it has to send API requests with
+    credentials (``fetch(..., {credentials: 'include'})``) or the cookie is
+    dropped, and the cookie needs HTTPS as seen by Django (see
+    SECURE_PROXY_SSL_HEADER in settings).
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.api_prefix = getattr(settings, 'API_PATH_PREFIX', '/api/')
+        self.cookie_name = settings.REPLICA_PIN_COOKIE
+        self.pin_seconds = settings.REPLICA_PIN_SECONDS
+
+    def __call__(self, request):
+        use_replica = (
+            request.method in self.SAFE_METHODS
+            and request.path_info.startswith(self.api_prefix)
+            and self.cookie_name not in request.COOKIES
+        )
+
+        token = routers.begin_request(use_replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            state = routers.end_request(token)
+
+        if state.wrote:
+            secure = request.is_secure()
+            response.set_cookie(
+                self.cookie_name, '1',
+                max_age=self.pin_seconds,
+                httponly=True,
+                secure=secure,
+                # The frontend is cross-site; browsers only send cross-site
+                # cookies with SameSite=None, which in turn requires Secure.
+                samesite='None' if secure else 'Lax',
+            )
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Captures a stack-sample profile and the SQL statements of a request
+    when it carries settings.PROFILING_HEADER matching PROFILING_TOKEN, or
+    for a PROFILING_SAMPLE_RATE fraction of requests. Captures are written
+    to PROFILING_DIR and served by /api/debug/profiles/.
+
+    With no token and a zero sample rate the middleware removes itself at
+    startup, so it costs nothing.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_TOKEN and not settings.PROFILING_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.exclude_prefix = '/api/debug/profiles/'
+
+    def should_profile(self, request):
+        if request.path_info.startswith(self.exclude_prefix):
+            return False
+        if settings.PROFILING_HEADER in request.headers:
+            return profiling.is_authorized(request)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        with profiling.Capture(request) as capture:
+            response = self.get_response(request)
+        response['X-Profile-Id'] = capture.save(response)
+        return response
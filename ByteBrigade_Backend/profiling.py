@@ -0,0 +1,174 @@
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+PROFILE_ID_RE = re.compile(r'^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$')
+
+
+def is_authorized(request):
+    token = settings.PROFILING_TOKEN
+    supplied = request.headers.get(settings.PROFILING_HEADER, '')
+    return bool(token) and hmac.compare_digest(supplied, token)
+
+
+def profile_dir():
+    path = Path(settings.PROFILING_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples one thread's Python stack every ``interval`` seconds and counts
+    identical stacks, i.e. collapsed-stack (flamegraph.pl / speedscope)
+    input. Unlike cProfile it keeps whole call paths and doesn't slow down
+    every function call.
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True, name='profile-sampler')
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                filename = '/'.join(Path(code.co_filename).parts[-2:])
+                stack.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class Capture:
+    """Stack samples and SQL statements for one request."""
+
+    def __init__(self, request):
+        self.request = request
+        self.statements = []
+        self._stack = ExitStack()
+        self.sampler = StackSampler(threading.get_ident(), settings.PROFILING_INTERVAL)
+
+    def _record_sql(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            # Params are left out on purpose: they include password hashes.
+            self.statements.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'many': many,
+                'duration_ms': round((time.perf_counter() - start) * 1000, 3),
+            })
+
+    def __enter__(self):
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self._record_sql))
+        self.started = time.perf_counter()
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.sampler.stop()
+        self.duration = time.perf_counter() - self.started
+        self._stack.close()
+        return False
+
+    def save(self, response):
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+        directory = profile_dir()
+
+        with open(directory / f"{profile_id}.collapsed", 'w') as f:
+            for stack, count in self.sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        meta = {
+            'id': profile_id,
+            'method': self.request.method,
+            'path': self.request.get_full_path(),
+            'status': response.status_code,
+            'duration_ms': round(self.duration * 1000, 3),
+            'samples': sum(self.sampler.stacks.values()),
+            'sql_count': len(self.statements),
+            'sql_ms': round(sum(s['duration_ms'] for s in self.statements), 3),
+            'sql': self.statements,
+        }
+        with open(directory / f"{profile_id}.json", 'w') as f:
+            json.dump(meta, f, indent=1)
+
+        prune(directory)
+        return profile_id
+
+
+def prune(directory):
+    """Keep only the newest settings.PROFILING_MAX_CAPTURES captures."""
+    captures = sorted(directory.glob('*.json'))
+    for meta_path in captures[:-settings.PROFILING_MAX_CAPTURES or None]:
+        for path in (meta_path, meta_path.with_suffix('.collapsed')):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class ProfileListView(APIView):
+    """
+    List stored captures, newest first. Requires the profiling token
+    header.
+    """
+
+    def get(self, request):
+        if not is_authorized(request):
+            return Response({"error": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
+
+        captures = []
+        for meta_path in sorted(profile_dir().glob('*.json'), reverse=True):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            meta.pop('sql', None)
+            captures.append(meta)
+        return Response(captures, status=status.HTTP_200_OK)
+
+
+class ProfileDownloadView(APIView):
+    """
+    Download one capture: ``collapsed`` (stack samples) or ``json``
+    (request info + SQL statements).
+    """
+
+    def get(self, request, profile_id, kind):
+        if not is_authorized(request):
+            return Response({"error": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
+        if not PROFILE_ID_RE.match(profile_id) or kind not in ('collapsed', 'json'):
+            return Response({"error": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        path = profile_dir() / f"{profile_id}.{kind}"
+        if not path.exists():
+            return Response({"error": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name)
@@ -0,0 +1,70 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+
+class RoutingState:
+    """
+    Per-request routing flags, shared by the middleware and the router.
+
+    ``replica`` is picked once per request: replicas lag by different
+    amounts, so reads spread over several could see rows in one query that
+    another query misses.
+    """
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.replica = random.choice(settings.REPLICA_DATABASES) if settings.REPLICA_DATABASES else None
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+def begin_request(use_replica):
+    return _state.set(RoutingState(use_replica))
+
+
+def end_request(token):
+    state = _state.get()
+    _state.reset(token)
+    return state
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads to the request's replica (one of settings.REPLICA_DATABASES,
+    chosen at random per request) when ReplicaRoutingMiddleware allowed it,
+    and everything else to 'default' (the primary).
+
+    Once a request writes, or while inside a transaction, its remaining
+    reads stay on the primary. Outside a request (shell, management
+    commands) everything uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is not None
+            and state.use_replica
+            and state.replica
+            and not connections['default'].in_atomic_block
+        ):
+            return state.replica
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.use_replica = False
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas are copies of the primary, so objects may relate freely.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.REPLICA_DATABASES
@@ -45,6 +45,9 @@ CORS_ALLOWED_ORIGINS = [
 # Allow credentials to be included in CORS requests
 CORS_ALLOW_CREDENTIALS = True
 
+# Response headers the frontend may read (search results total)
+CORS_EXPOSE_HEADERS = ['X-Total-Count']
+
 # Allow specific headers
 CORS_ALLOW_HEADERS = [
     'accept',
@@ -56,6 +59,7 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'x-profile-token',
 ]
 
 # Allow specific methods
@@ -83,6 +87,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     "rest_framework",
     'corsheaders',
     "backend"
@@ -91,14 +96,65 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'ByteBrigade_Backend.middleware.ReplicaRoutingMiddleware',
+    'ByteBrigade_Backend.middleware.BrowserOnlyMiddleware',
+    'ByteBrigade_Backend.middleware.ProfilingMiddleware',
+]
+
+# Middleware only the admin/browser pages need. BrowserOnlyMiddleware runs
+# this stack for every path except API_PATH_PREFIX, so JSON API requests
+# skip sessions, CSRF, auth, messages and X-Frame-Options entirely.
+API_PATH_PREFIX = '/api/'
+
+BROWSER_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# The admin checks look for these classes directly in MIDDLEWARE; they are
+# installed through BROWSER_MIDDLEWARE instead.
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+
+# The API is JSON only and doesn't use Django sessions for auth, so drop the
+# browsable API renderer, form parsers and session/basic authentication.
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+    ],
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    # Reverse proxies in front of the app. Throttles take the client address
+    # from X-Forwarded-For only this many hops back; with 0 they use
+    # REMOTE_ADDR, so a client can't pick its own address by sending the header.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
+
+# Per-process admission control for expensive endpoints (backend.admission).
+# max_concurrent requests run at once, max_queue more wait up to
+# queue_timeout seconds, the rest get 503 + Retry-After. Login also has
+# token buckets per client and per account (capacity burst, refill_rate
+# tokens/second).
+# Gates count the request threads of one process (gunicorn_conf runs
+# GUNICORN_THREADS, default 10, per worker). Every gated request, running
+# or queued, holds a thread, so max_concurrent + max_queue summed over all
+# gates must stay below that: here 7 of 10, leaving 3 threads for health
+# checks and the cheap endpoints.
+ADMISSION_CONTROL = {
+    'search': {'max_concurrent': 2, 'max_queue': 1, 'queue_timeout': 2.0, 'retry_after': 1},
+    'debug': {'max_concurrent': 1, 'max_queue': 0, 'queue_timeout': 0.0, 'retry_after': 5},
+    'login': {
+        'max_concurrent': 1, 'max_queue': 1, 'queue_timeout': 2.0, 'retry_after': 1,
+        'bucket': {'capacity': 5, 'refill_rate': 0.2},
+    },
+    'teams': {'max_concurrent': 1, 'max_queue': 0, 'queue_timeout': 0.0, 'retry_after': 5},
+}
+
 ROOT_URLCONF = 'ByteBrigade_Backend.urls'
 
 TEMPLATES = [
@@ -122,10 +178,79 @@ WSGI_APPLICATION = 'ByteBrigade_Backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+def database_config(url):
+    # sslmode is a Postgres option; SQLite (local primary/replica testing)
+    # rejects it.
+    return dj_database_url.parse(url, conn_max_age=600, ssl_require=not url.startswith('sqlite'))
+
+
 DATABASES = {
-    'default': dj_database_url.config(conn_max_age=600, ssl_require=True)
+    'default': database_config(os.environ['DATABASE_URL']) if os.environ.get('DATABASE_URL') else {}
 }
 
+# Read replicas, comma separated, e.g.
+# DATABASE_REPLICA_URLS=postgres://...replica1,postgres://...replica2
+# Locally, a copy of the primary works: sqlite:///replica.sqlite3
+REPLICA_DATABASES = []
+for index, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    alias = f'replica{index}'
+    DATABASES[alias] = {**database_config(url.strip()), 'TEST': {'MIRROR': 'default'}}
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['ByteBrigade_Backend.routers.PrimaryReplicaRouter']
+
+# After a write, the client's reads stick to the primary for this long
+# (ReplicaRoutingMiddleware) so it reads its own writes despite replica lag.
+REPLICA_PIN_COOKIE = 'pin_primary'
+REPLICA_PIN_SECONDS = 5
+
+# Behind a TLS-terminating proxy (NUM_PROXIES > 0) trust its
+# X-Forwarded-Proto, so request.is_secure() holds and the pin cookie can be
+# SameSite=None; Secure, the only kind the cross-site frontend sends back.
+if REST_FRAMEWORK['NUM_PROXIES']:
+    SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+
+
+# /api/changes/ holds back log entries younger than this many seconds so
+# two log inserts racing for ids can't make a client's token skip one.
+# (Entries are inserted after the write commits; see changefeed.record.)
+CHANGEFEED_SETTLE_SECONDS = 2
+
+
+# Tables with fewer rows than this (by the planner's estimate) are counted
+# exactly; larger unfiltered tables use the estimate (backend.pagination).
+EXACT_COUNT_THRESHOLD = 10000
+
+
+# Worker processes for the team formation solver (None = CPU count).
+TEAM_FORMATION_WORKERS = None
+
+# A running team formation job refreshes its heartbeat this often; one
+# with no heartbeat (or a pending one not started) for STALE_SECONDS was
+# lost to a restart and is marked failed (backend.team_jobs).
+TEAM_FORMATION_HEARTBEAT_SECONDS = 10
+TEAM_FORMATION_STALE_SECONDS = 60
+
+
+# /api/users/availability/: per-process Bloom filter of usernames and
+# emails. Users created by other processes are picked up from the change
+# feed at most this often.
+AVAILABILITY_BLOOM_ERROR_RATE = 0.01
+AVAILABILITY_BLOOM_MIN_CAPACITY = 10000
+AVAILABILITY_REFRESH_SECONDS = 5
+
+
+# On-demand request profiling (ByteBrigade_Backend.profiling). Requests that
+# send PROFILING_HEADER with PROFILING_TOKEN, plus a PROFILING_SAMPLE_RATE
+# fraction of all requests, get a stack-sample profile and SQL list saved
+# to PROFILING_DIR. With no token and rate 0 the middleware is disabled.
+PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN', '')
+PROFILING_HEADER = 'X-Profile-Token'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_INTERVAL = 0.001
+PROFILING_DIR = os.environ.get('PROFILING_DIR', BASE_DIR / 'profiles')
+PROFILING_MAX_CAPTURES = 200
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
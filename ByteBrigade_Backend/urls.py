@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.http import JsonResponse
+from . import profiling, warmup
 
 def home_view(request):
 
@@ -20,6 +21,9 @@ def home_view(request):
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/debug/profiles/', profiling.ProfileListView.as_view(), name='profile-list'),
+    path('api/debug/profiles/<str:profile_id>.<str:kind>', profiling.ProfileDownloadView.as_view(), name='profile-download'),
+    path('api/health/ready/', warmup.ReadinessView.as_view(), name='health-ready'),
     path('api/', include('backend.urls')),
     path('', home_view, name='home'),
 ]
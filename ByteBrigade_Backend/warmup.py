@@ -0,0 +1,171 @@
+import io
+import logging
+import threading
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.apps import apps
+from django.db import connections
+from django.urls import get_resolver
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from backend.background import closes_connections
+
+logger = logging.getLogger(__name__)
+
+# Requests replayed through the WSGI app by warm(): the Skill table, the
+# user list (UserSerializer with prefetched skills) and the DRF stack.
+WARMUP_PATHS = ('/api/health/', '/api/skills/', '/api/users/?limit=20')
+
+state = {'ready': False, 'warming': False, 'error': None, 'steps': {}}
+_lock = threading.Lock()
+
+
+def prepare():
+    """
+    Process-wide warm-up that needs no database: import the URLconf and
+    every view module, fill model _meta caches and build the hot serializers'
+    fields. Under gunicorn this runs in the master before forking, so
+    workers inherit it.
+    """
+    from backend.serializer import SkillSerializer, UserSerializer
+
+    started = time.perf_counter()
+    resolver = get_resolver()
+    resolver.reverse_dict  # imports the views and builds the reverse lookup tables
+    for model in apps.get_models():
+        model._meta.get_fields()
+        model._meta.related_objects
+    api_settings.DEFAULT_RENDERER_CLASSES, api_settings.DEFAULT_PARSER_CLASSES
+    for serializer_class in (SkillSerializer, UserSerializer):
+        serializer_class().fields
+
+    # Connections must never cross a fork.
+    connections.close_all()
+    state['steps']['prepare'] = round(time.perf_counter() - started, 4)
+
+
+def _timed(name, notify, func, *args):
+    started = time.perf_counter()
+    func(*args)
+    state['steps'][name] = round(time.perf_counter() - started, 4)
+    if notify:
+        notify()
+
+
+def _connect():
+    for alias in connections:
+        connections[alias].ensure_connection()
+
+
+def _connect_threads(executor, threads):
+    # Each task holds its thread until all have started, so every one of
+    # the pool's threads opens its own connections.
+    barrier = threading.Barrier(threads)
+
+    def connect():
+        barrier.wait(timeout=30)
+        _connect()
+
+    for future in [executor.submit(connect) for _ in range(threads)]:
+        future.result()
+
+
+def _request(application, path):
+    path_info, _, query = path.partition('?')
+    environ = {'PATH_INFO': path_info, 'QUERY_STRING': query, 'wsgi.input': io.BytesIO()}
+    setup_testing_defaults(environ)
+
+    statuses = []
+    response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    if not statuses[0].startswith('200'):
+        logger.warning(f"Warm-up request {path} returned {statuses[0]}")
+
+
+def warm(application, notify=None, executor=None, threads=0):
+    """
+    Per-process warm-up, after fork: open this process's database
+    connections, load the availability filter, mark team formation jobs
+    lost to a restart as failed and send WARMUP_PATHS through
+    ``application``. ``notify`` is called between steps (gunicorn's worker
+    heartbeat). Marks the process ready and returns the step timings.
+
+    Django connections are per thread, so those opened here serve no
+    request. Given the ``executor`` requests run on and its number of
+    ``threads``, each of those threads opens its own too; they are kept
+    for CONN_MAX_AGE.
+
+    A failure (say the database is down) is logged and kept in
+    state['error']; the process stays not ready and the next readiness
+    probe tries again.
+    """
+    from backend import availability, team_jobs
+
+    with _lock:
+        if state['ready'] or state['warming']:
+            return state['steps']
+        state['warming'] = True
+
+    started = time.perf_counter()
+    try:
+        _timed('connect', notify, _connect)
+        _timed('availability', notify, availability.index.load)
+        _timed('stale_jobs', notify, team_jobs.fail_stale_jobs)
+        for path in WARMUP_PATHS:
+            _timed(path, notify, _request, application, path)
+        if executor:
+            _timed('connect_threads', notify, _connect_threads, executor, threads)
+    except Exception as exc:
+        logger.exception("Warm-up failed")
+        state['error'] = f"{type(exc).__name__}: {exc}"
+    else:
+        state['steps']['warm'] = round(time.perf_counter() - started, 4)
+        state['error'] = None
+        state['ready'] = True
+    finally:
+        state['warming'] = False
+    return state['steps']
+
+
+@closes_connections
+def _warm_in_background():
+    from django.core.wsgi import get_wsgi_application
+
+    if 'prepare' not in state['steps']:
+        prepare()
+    warm(get_wsgi_application())
+
+
+def start_warming():
+    """
+    Run warm() in a background thread unless it is done or running. For
+    servers that don't call it themselves (runserver, plain gunicorn,
+    ASGI); started by the first readiness probe.
+    """
+    if state['ready'] or state['warming']:
+        return
+    threading.Thread(target=_warm_in_background, daemon=True, name='warmup').start()
+
+
+class ReadinessView(APIView):
+    """
+    Readiness probe: 503 until this process has run warm(), then 200 with
+    the warm-up timings. Starts (or retries) the warm-up if nothing else
+    has. /api/health/ stays the liveness check.
+    """
+    throttle_classes = []
+
+    def get(self, request):
+        if not state['ready']:
+            start_warming()
+            return Response({"status": "warming", "error": state['error']},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({"status": "ready", "warmup": state['steps']}, status=status.HTTP_200_OK)
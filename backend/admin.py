@@ -1,6 +1,59 @@
 from django.contrib import admin
-from .models import User,Skill
-admin.site.register(User)
-admin.site.register(Skill)
+from . import cooccurrence, memberships
+from .models import User, Skill, HackathonExperience, UserSkill
+from .pagination import ApproximateCountPaginator
 
-# Register your models here.
+
+class UserSkillInline(admin.TabularInline):
+    model = UserSkill
+    autocomplete_fields = ("skill",)
+    ordering = ("kind", "skill__name")
+    extra = 0
+
+
+@admin.register(User)
+class UserAdmin(admin.ModelAdmin):
+    list_display = ("id", "username", "name", "email", "college_name", "year", "is_beginner", "created_at")
+    list_display_links = ("id", "username")
+    list_filter = ("is_beginner", "gender", "year")
+    # Admin search compiles to UPPER(col) = / LIKE 'term%'; on Postgres
+    # migration 0010 adds matching UPPER(col) text_pattern_ops indexes.
+    search_fields = ("=username", "=email", "^name", "^college_name")
+    ordering = ("-created_at",)
+    inlines = (UserSkillInline,)
+    readonly_fields = ("password", "created_at", "updated_at")
+    list_per_page = 50
+
+    # Don't COUNT(*) the whole table on every changelist page
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+    def save_related(self, request, form, formsets, change):
+        # Inline rows are saved one by one, not through backend.memberships.
+        user_id = form.instance.id
+        before = memberships.skill_sets([user_id], UserSkill.KNOWN)
+        super().save_related(request, form, formsets, change)
+        cooccurrence.apply_changes(before, memberships.skill_sets([user_id], UserSkill.KNOWN))
+
+
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ("id", "name")
+    search_fields = ("name",)
+    ordering = ("name",)
+    list_per_page = 100
+
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(HackathonExperience)
+class HackathonExperienceAdmin(admin.ModelAdmin):
+    list_display = ("id", "hackathon_name", "organizer_name", "user", "created_at")
+    list_select_related = ("user",)
+    search_fields = ("hackathon_name", "organizer_name", "=user__username")
+    raw_id_fields = ("user",)
+    list_per_page = 50
+
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,249 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+
+DEFAULT_GATE = {
+    'max_concurrent': 4,
+    'max_queue': 16,
+    'queue_timeout': 2.0,
+    'retry_after': 1,
+}
+
+
+class ServiceOverloaded(APIException):
+    """
+    503 raised when a gate is full. DRF's exception handler turns ``wait``
+    into a Retry-After header.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Server is busy, please retry shortly.'
+    default_code = 'overloaded'
+
+    def __init__(self, wait, detail=None):
+        super().__init__(detail)
+        self.wait = wait
+
+
+class AdmissionGate:
+    """
+    Concurrency limiter with a bounded wait queue.
+
+    At most ``max_concurrent`` requests run at once; up to ``max_queue`` more
+    wait for a slot for at most ``queue_timeout`` seconds. Anything beyond
+    that is rejected straight away instead of piling up. State is per
+    process (one gate per gunicorn worker, shared by its request threads),
+    so the limits only bite with threaded workers; see gunicorn_conf.
+    """
+
+    def __init__(self, name, max_concurrent, max_queue, queue_timeout, retry_after):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+        self._cond = threading.Condition()
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    def acquire(self):
+        with self._cond:
+            if self.active < self.max_concurrent:
+                self.active += 1
+                self.admitted += 1
+                return
+
+            if self.queued >= self.max_queue:
+                self.rejected_queue_full += 1
+                raise ServiceOverloaded(self.retry_after)
+
+            self.queued += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        raise ServiceOverloaded(self.retry_after)
+                    self._cond.wait(remaining)
+            finally:
+                self.queued -= 1
+
+            self.active += 1
+            self.admitted += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'active': self.active,
+                'queued': self.queued,
+                'admitted': self.admitted,
+                'rejected_queue_full': self.rejected_queue_full,
+                'rejected_timeout': self.rejected_timeout,
+            }
+
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+
+def get_gate(name):
+    """
+    Return the process-wide gate for ``name``, configured from
+    settings.ADMISSION_CONTROL[name] on first use.
+    """
+    gate = _gates.get(name)
+    if gate is None:
+        with _gates_lock:
+            gate = _gates.get(name)
+            if gate is None:
+                config = getattr(settings, 'ADMISSION_CONTROL', {}).get(name, {})
+                options = {key: config.get(key, default) for key, default in DEFAULT_GATE.items()}
+                gate = _gates[name] = AdmissionGate(name, **options)
+    return gate
+
+
+class AdmissionControlMixin:
+    """
+    Put an APIView behind a named AdmissionGate.
+
+    The slot is taken after authentication/throttling in ``initial()`` and
+    released when ``dispatch()`` returns or raises. Views without
+    ``admission_gate`` are not limited.
+    """
+    admission_gate = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.admission_gate:
+            gate = get_gate(self.admission_gate)
+            gate.acquire()
+            self._admitted_gate = gate
+
+    def dispatch(self, request, *args, **kwargs):
+        self._admitted_gate = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._admitted_gate is not None:
+                self._admitted_gate.release()
+                self._admitted_gate = None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Per-client token bucket: ``capacity`` requests in a burst, refilled at
+    ``refill_rate`` tokens per second. Buckets live in process memory.
+
+    A request draws a token from every bucket named by ``get_keys()`` (by
+    default just the client address, see REST_FRAMEWORK['NUM_PROXIES'])
+    and is refused if any of them is empty.
+
+    Settings are read from settings.ADMISSION_CONTROL[scope]['bucket'].
+    """
+    scope = None
+    default_bucket = {'capacity': 5, 'refill_rate': 0.2}
+    max_clients = 10000
+
+    _lock = threading.Lock()
+    _buckets = None
+    rejected = 0
+
+    def __init__(self):
+        config = getattr(settings, 'ADMISSION_CONTROL', {}).get(self.scope, {})
+        bucket = {**self.default_bucket, **config.get('bucket', {})}
+        self.capacity = bucket['capacity']
+        self.refill_rate = bucket['refill_rate']
+        self._wait = 0
+        if type(self)._buckets is None:
+            type(self)._buckets = {}
+
+    def get_keys(self, request):
+        return [('client', self.get_ident(request))]
+
+    def allow_request(self, request, view):
+        keys = self.get_keys(request)
+        now = time.monotonic()
+        cls = type(self)
+
+        with cls._lock:
+            buckets = cls._buckets
+            levels = {}
+            for key in keys:
+                tokens, updated = buckets.get(key, (self.capacity, now))
+                levels[key] = min(self.capacity, tokens + (now - updated) * self.refill_rate)
+
+            if all(tokens >= 1 for tokens in levels.values()):
+                for key, tokens in levels.items():
+                    buckets[key] = (tokens - 1, now)
+                if len(buckets) > self.max_clients:
+                    self._prune(now)
+                return True
+
+            # Refused: nothing is taken, so a full bucket stays full.
+            for key, tokens in levels.items():
+                buckets[key] = (tokens, now)
+            cls.rejected += 1
+            self._wait = max((1 - tokens) / self.refill_rate for tokens in levels.values() if tokens < 1)
+            return False
+
+    def _prune(self, now):
+        # Drop buckets that have refilled completely; they hold no state.
+        full_after = self.capacity / self.refill_rate
+        buckets = type(self)._buckets
+        for key, (_, updated) in list(buckets.items()):
+            if now - updated >= full_after:
+                del buckets[key]
+
+    def wait(self):
+        return math.ceil(self._wait)
+
+    @classmethod
+    def stats(cls):
+        with cls._lock:
+            return {
+                'clients': len(cls._buckets or {}),
+                'rejected': cls.rejected,
+            }
+
+
+class LoginThrottle(TokenBucketThrottle):
+    """
+    A bucket per client address, which bounds the password hashing one
+    client can cause whatever usernames it tries, and one per submitted
+    username, which bounds guesses at one account spread over many
+    addresses.
+    """
+    scope = 'login'
+
+    def get_keys(self, request):
+        keys = super().get_keys(request)
+        data = request.data if isinstance(request.data, dict) else {}
+        if data.get('username'):
+            keys.append(('account', str(data['username'])))
+        return keys
+
+
+def admission_stats():
+    with _gates_lock:
+        gates = list(_gates.values())
+    return {
+        'gates': {gate.name: gate.stats() for gate in gates},
+        'throttles': {LoginThrottle.scope: LoginThrottle.stats()},
+    }
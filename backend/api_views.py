@@ -3,18 +3,44 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Q
-from .models import User, Skill
-from .serializer import UserSerializer, SkillSerializer
+from django.db import transaction
+from django.utils import timezone
+from .models import User, Skill, TeamFormationJob, UserSkill
+from .serializer import (
+    UserSerializer, SkillSerializer, HackathonExperienceSerializer,
+    UserBulkPatchSerializer, UserBulkFilterSerializer,
+    TeamFormationRequestSerializer, TeamFormationJobSerializer,
+)
+from . import availability, changefeed, cooccurrence, lookup, memberships, search, team_jobs
+from .admission import AdmissionControlMixin, LoginThrottle, admission_stats
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class LoginView(APIView):
+def query_int(request, name, default, minimum=0, maximum=None):
+    """
+    Integer query parameter, at least ``minimum`` and capped at ``maximum``.
+    Raises ValueError with a message for the client if it isn't one.
+    """
+    raw = request.query_params.get(name, '').strip()
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+    if value < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    return value if maximum is None else min(value, maximum)
+
+
+class LoginView(AdmissionControlMixin, APIView):
     """
     Simple login endpoint
     """
+    admission_gate = 'login'
+    throttle_classes = [LoginThrottle]
 
     def post(self, request):
         username = request.data.get('username')
@@ -45,7 +71,7 @@ class LoginView(APIView):
 
 
 class UserListCreateView(generics.ListCreateAPIView):
-    queryset = User.objects.all().prefetch_related("my_skills", "known_skills", "desired_skills")
+    queryset = User.objects.with_skills()
     serializer_class = UserSerializer
 
     def get_queryset(self):
@@ -57,13 +83,193 @@ class UserListCreateView(generics.ListCreateAPIView):
 
 
 class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = User.objects.all().prefetch_related("my_skills", "known_skills", "desired_skills")
+    queryset = User.objects.with_skills()
     serializer_class = UserSerializer
 
 
+class UserBulkUpdateView(APIView):
+    """
+    Partial update of many users in one request.
+
+    PATCH a list of updates, each with an "id":
+        [{"id": 1, "isBeginner": false}, {"id": 2, "college": "IIT"}]
+    or a filter plus one patch applied to every matching user:
+        {"filter": {"college": "IIT"}, "patch": {"addKnownSkills": ["Python"]}}
+
+    Valid items are applied in one transaction (bulk UPDATE plus set-based
+    inserts/deletes on UserSkill); invalid items are reported in
+    "errors" by index and skipped.
+    """
+
+    def patch(self, request):
+        data = request.data
+        errors = []
+
+        if isinstance(data, list):
+            patches = self._validate_items(data, errors)
+            shared_patch = None
+        elif isinstance(data, dict) and 'filter' in data and 'patch' in data:
+            user_filter = UserBulkFilterSerializer(data=data['filter'])
+            shared_patch = UserBulkPatchSerializer(data=data['patch'])
+            filter_valid = user_filter.is_valid()
+            if not (shared_patch.is_valid() and filter_valid):
+                return Response({
+                    'errors': {'filter': user_filter.errors, 'patch': shared_patch.errors}
+                }, status=status.HTTP_400_BAD_REQUEST)
+            user_ids = user_filter.filter_queryset(User.objects.all()).values_list('id', flat=True)
+            patches = [(user_id, shared_patch) for user_id in user_ids]
+        else:
+            return Response({
+                'error': 'Expected a list of updates or {"filter": ..., "patch": ...}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not patches:
+            return Response({
+                'updated': [],
+                'errors': errors
+            }, status=status.HTTP_400_BAD_REQUEST if errors else status.HTTP_200_OK)
+
+        updated_ids = sorted({user_id for user_id, _ in patches})
+        with transaction.atomic():
+            self._apply_scalar_changes(patches, shared_patch)
+            self._apply_skill_changes(patches)
+            # bulk_update/update() skip post_save, which maintains the lookup index
+            if any({'name', 'college'} & serializer.validated_data.keys() for _, serializer in patches):
+                lookup.index_users(updated_ids)
+            # Bulk writes bypass the model signals that feed /api/changes/
+            changefeed.record('user', updated_ids)
+
+        return Response({
+            'updated': updated_ids,
+            'errors': errors
+        }, status=status.HTTP_200_OK)
+
+    def _validate_items(self, items, errors):
+        validated = []
+        for index, item in enumerate(items):
+            serializer = UserBulkPatchSerializer(data=item)
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+            elif 'id' not in serializer.validated_data:
+                errors.append({'index': index, 'errors': {'id': ['This field is required.']}})
+            else:
+                validated.append((index, serializer))
+
+        existing = set(User.objects.filter(
+            id__in=[serializer.validated_data['id'] for _, serializer in validated]
+        ).values_list('id', flat=True))
+
+        patches = []
+        for index, serializer in validated:
+            user_id = serializer.validated_data['id']
+            if user_id in existing:
+                patches.append((user_id, serializer))
+            else:
+                errors.append({'index': index, 'id': user_id, 'errors': {'id': ['User not found.']}})
+        return patches
+
+    def _apply_scalar_changes(self, patches, shared_patch):
+        now = timezone.now()
+
+        if shared_patch is not None:
+            # Same patch for everyone: a single UPDATE ... WHERE id IN (...)
+            User.objects.filter(id__in=[user_id for user_id, _ in patches]).update(
+                **shared_patch.scalar_changes(), updated_at=now
+            )
+            return
+
+        changes = {}
+        for user_id, serializer in patches:
+            changes.setdefault(user_id, {}).update(serializer.scalar_changes())
+
+        fields = sorted({field for user_changes in changes.values() for field in user_changes})
+        users = User.objects.only('id', *fields).in_bulk(list(changes))
+        for user_id, user_changes in changes.items():
+            user = users[user_id]
+            for field, value in user_changes.items():
+                setattr(user, field, value)
+            user.updated_at = now
+
+        User.objects.bulk_update(users.values(), fields + ['updated_at'], batch_size=500)
+
+    def _apply_skill_changes(self, patches):
+        keys = {
+            'addKnownSkills': (UserSkill.KNOWN, 'add'),
+            'removeKnownSkills': (UserSkill.KNOWN, 'remove'),
+            'addDesiredSkills': (UserSkill.DESIRED, 'add'),
+            'removeDesiredSkills': (UserSkill.DESIRED, 'remove'),
+        }
+        names = set()
+        for _, serializer in patches:
+            for key in keys:
+                names.update(memberships.normalize(serializer.validated_data.get(key, [])))
+        if not names:
+            return
+        skill_ids = memberships.get_or_create_skills(names)
+
+        changes = {(kind, action): {} for kind, action in keys.values()}
+        for user_id, serializer in patches:
+            for key, change in keys.items():
+                for name in memberships.normalize(serializer.validated_data.get(key, [])):
+                    changes[change].setdefault(user_id, set()).add(skill_ids[name])
+
+        for kind in (UserSkill.KNOWN, UserSkill.DESIRED):
+            memberships.change_skills(kind, add=changes[kind, 'add'], remove=changes[kind, 'remove'])
+
+
+class UserLookupView(APIView):
+    """
+    Typeahead search on name, username and college_name.
+
+    ?q=ank        partial text (at least 2 characters)
+    ?limit=10     max results (max 50)
+
+    Backed by pg_trgm GIN indexes on Postgres, or the UserTrigram table
+    elsewhere; results are ranked by trigram similarity.
+    """
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = query_int(request, 'limit', 10, minimum=1, maximum=50)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(query) < 2:
+            return Response([], status=status.HTTP_200_OK)
+        return Response(lookup.lookup_users(query, limit), status=status.HTTP_200_OK)
+
+
+class UserAvailabilityView(APIView):
+    """
+    Live username/email check for the signup form.
+
+    ?username=   and/or
+    ?email=
+
+    Answered from a per-process Bloom filter, so a free value usually costs
+    no query; only possible matches are confirmed against the database.
+    A user created moments ago by another server process may still show as
+    available, so signup keeps validating on submit.
+    """
+
+    def get(self, request):
+        values = {
+            field: request.query_params[field].strip()
+            for field in availability.FIELDS
+            if request.query_params.get(field, '').strip()
+        }
+        if not values:
+            return Response(
+                {"error": "username or email is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(availability.check(**values), status=status.HTTP_200_OK)
+
+
 class UserUpdateSkillsView(APIView):
     """
-    Update user skills (known_skills, desired_skills)
+    Update user skills (known and desired)
     """
 
     def put(self, request, user_id):
@@ -79,27 +285,13 @@ class UserUpdateSkillsView(APIView):
         known_skills = request.data.get('knownSkills', [])
         desired_skills = request.data.get('desiredSkills', [])
 
-        # Update known_skills
+        # Update known skills
         if known_skills is not None:
-            user.known_skills.clear()
-            user.my_skills.clear()  # Also clear for backward compatibility
-            for skill_name in known_skills:
-                if skill_name and skill_name.strip():
-                    skill, _ = Skill.objects.get_or_create(
-                        name=skill_name.strip().capitalize()
-                    )
-                    user.known_skills.add(skill)
-                    user.my_skills.add(skill)
-
-        # Update desired_skills
+            memberships.set_skills(user.id, UserSkill.KNOWN, known_skills)
+
+        # Update desired skills
         if desired_skills is not None:
-            user.desired_skills.clear()
-            for skill_name in desired_skills:
-                if skill_name and skill_name.strip():
-                    skill, _ = Skill.objects.get_or_create(
-                        name=skill_name.strip().capitalize()
-                    )
-                    user.desired_skills.add(skill)
+            memberships.set_skills(user.id, UserSkill.DESIRED, desired_skills)
 
         user.save()
 
@@ -127,65 +319,166 @@ class SkillDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = SkillSerializer
 
 
-class UserSearchView(APIView):
+class SkillRelatedView(APIView):
     """
-    🔧 FIXED: Search users based on skills and filters
+    "People who know X also know Y": top-k skills by lift/PMI from the
+    known skills co-occurrence matrix.
+
+    ?k=10           number of skills to return (max 50)
+    ?min_count=1    ignore pairs seen together fewer times than this
+    """
+
+    def get(self, request, pk):
+        try:
+            skill = Skill.objects.get(pk=pk)
+        except Skill.DoesNotExist:
+            return Response(
+                {"error": "Skill not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            k = query_int(request, 'k', 10, maximum=50)
+            min_count = query_int(request, 'min_count', 1, minimum=1)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        related = cooccurrence.related_skills(skill.id, k, min_count)
+        names = dict(Skill.objects.filter(id__in=[item['skill_id'] for item in related]).values_list('id', 'name'))
+        for item in related:
+            item['name'] = names[item['skill_id']]
+
+        return Response({
+            'skill': SkillSerializer(skill).data,
+            'related': related
+        }, status=status.HTTP_200_OK)
+
+
+class UserSearchView(AdmissionControlMixin, APIView):
     """
+    Search users by skills and filters.
+
+    ?skills=a,b,c       skills to match (case-insensitive)
+    ?mode=all|any       all: users must have every skill (default)
+                        any: users with at least one, ranked by how many
+    ?include_beginner=  true (default) / false
+    ?skip=&limit=       pagination (limit 1-100, default 100)
+
+    The body is the list of users, as before paging was added; the number
+    of matches across all pages is in the X-Total-Count header.
+    """
+    admission_gate = 'search'
 
     def get(self, request):
-        logger.info(f"🔍 Search request received with params: {request.query_params}")
+        skill_names = search.parse_skill_list(request.query_params.get('skills', ''))
+        mode = request.query_params.get('mode', 'all').lower()
+        include_beginner = request.query_params.get('include_beginner', 'true').lower() == 'true'
+        try:
+            skip = query_int(request, 'skip', 0)
+            limit = query_int(request, 'limit', 100, minimum=1, maximum=100)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if mode not in search.SEARCH_MODES:
+            return Response(
+                {"error": f"mode must be one of: {', '.join(search.SEARCH_MODES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        logger.info(f"Search request - skills: {skill_names}, mode: {mode}, include beginners: {include_beginner}")
+
+        users = User.objects.with_skills().prefetch_related("hackathon_experiences")
 
-        # Get query parameters
-        skills_param = request.query_params.get('skills', '')
+        if not skill_names:
+            if not include_beginner:
+                users = users.filter(is_beginner=False)
+            total, page = search.paginate_with_total(users, skip, limit)
+            return self._page_response(UserSerializer(page, many=True).data, total)
+
+        skill_ids, missing = search.resolve_skill_ids(skill_names)
+        if mode == 'all' and missing:
+            total, ranked = 0, []
+        else:
+            total, ranked = search.ranked_user_search(skill_ids, mode, include_beginner, skip, limit)
+
+        users_by_id = users.in_bulk([user_id for user_id, _, _ in ranked])
+        # A user deleted since the ranking query is left out of the page.
+        ranked = [row for row in ranked if row[0] in users_by_id]
+        results = UserSerializer([users_by_id[user_id] for user_id, _, _ in ranked], many=True).data
+        for data, (_, matched, wanted) in zip(results, ranked):
+            data['matched_skills'] = matched
+            data['wanted_skills'] = wanted
+
+        logger.info(f"Search results: {total} users found")
+
+        return self._page_response(results, total)
+
+    def _page_response(self, results, total):
+        response = Response(results, status=status.HTTP_200_OK)
+        response['X-Total-Count'] = total
+        return response
+
+
+class UserSearchFacetsView(AdmissionControlMixin, APIView):
+    """
+    Facet counts for the search sidebar: users per college, year, gender,
+    beginner flag and top known skills.
+
+    Takes the same skills/mode/include_beginner filters as UserSearchView.
+    ?facet_limit=20 caps the college and skill lists.
+    """
+    admission_gate = 'search'
+
+    def get(self, request):
+        skill_names = search.parse_skill_list(request.query_params.get('skills', ''))
+        mode = request.query_params.get('mode', 'all').lower()
         include_beginner = request.query_params.get('include_beginner', 'true').lower() == 'true'
-        team_size = request.query_params.get('team_size', '3')
-
-        logger.info(f"📋 Search criteria - Skills: {skills_param}, Include beginners: {include_beginner}")
-
-        # Start with all users
-        users = User.objects.all().prefetch_related("known_skills", "desired_skills", "my_skills")
-        initial_count = users.count()
-        logger.info(f"📊 Initial user count: {initial_count}")
-
-        # 🔧 FIXED: Filter by skills if provided
-        if skills_param:
-            skill_list = [s.strip() for s in skills_param.split(',') if s.strip()]
-            logger.info(f"🎯 Searching for skills: {skill_list}")
-
-            if skill_list:  # Only filter if we have skills
-                # Create AND condition for each skill (user must have ALL skills)
-                for skill in skill_list:
-                    # Use exact match with case-insensitive lookup
-                    skill_query = Q(
-                        Q(known_skills__name__iexact=skill) |
-                        Q(my_skills__name__iexact=skill)
-                    )
-                    users = users.filter(skill_query).distinct()
-                    logger.info(f"🔍 After filtering for '{skill}': {users.count()} users")
-
-        # Filter by beginner preference
-        if not include_beginner:
-            users = users.filter(is_beginner=False)
-            logger.info(f"🎓 After filtering beginners: {users.count()} users")
-
-        final_count = users.count()
-        logger.info(f"✅ Final search results: {final_count} users found")
-
-        # Serialize and return
-        serializer = UserSerializer(users, many=True)
-
-        # Add debug info to response
-        response_data = {
-            'results': serializer.data,
-            'count': final_count,
-            'debug': {
-                'initial_count': initial_count,
-                'search_skills': skills_param.split(',') if skills_param else [],
-                'include_beginner': include_beginner
-            }
-        }
+        try:
+            facet_limit = query_int(request, 'facet_limit', 20, minimum=1, maximum=100)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if mode not in search.SEARCH_MODES:
+            return Response(
+                {"error": f"mode must be one of: {', '.join(search.SEARCH_MODES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        users = search.filtered_users(skill_names, mode, include_beginner)
+        return Response(search.facet_counts(users, facet_limit), status=status.HTTP_200_OK)
+
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+class TeamFormationJobCreateView(AdmissionControlMixin, APIView):
+    """
+    Start a background team formation run over all users or a cohort.
+
+    POST {"team_size": 4, "required_skills": ["Python", "React"],
+          "filter": {"college": "IIT"}}
+    returns 202 with the job; poll /api/teams/jobs/<id>/ for the result.
+    One job runs at a time: while one is pending or running, 409 with it.
+    """
+    admission_gate = 'teams'
+
+    def post(self, request):
+        serializer = TeamFormationRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        active = team_jobs.active_job()
+        if active is not None:
+            return Response({
+                "error": "A team formation job is already pending or running",
+                "job": TeamFormationJobSerializer(active).data,
+            }, status=status.HTTP_409_CONFLICT)
+
+        job = TeamFormationJob.objects.create(params=serializer.data)
+        team_jobs.start_job(job)
+
+        return Response(TeamFormationJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class TeamFormationJobDetailView(generics.RetrieveAPIView):
+    queryset = TeamFormationJob.objects.all()
+    serializer_class = TeamFormationJobSerializer
 
 
 class UserBySkillView(generics.ListAPIView):
@@ -198,26 +491,29 @@ class UserBySkillView(generics.ListAPIView):
         skill_name = self.request.query_params.get("skill", None)
         if skill_name:
             return User.objects.filter(
-                Q(my_skills__name__iexact=skill_name.strip()) |
-                Q(known_skills__name__iexact=skill_name.strip())
-            ).distinct().prefetch_related("my_skills", "known_skills", "desired_skills")
+                skill_memberships__kind=UserSkill.KNOWN,
+                skill_memberships__skill__name__iexact=skill_name.strip()
+            ).distinct().with_skills()
         return User.objects.none()
 
 
 class HealthCheckView(APIView):
     """
-    Health check endpoint
+    Health check endpoint. Never admission controlled or throttled, so it
+    keeps answering while expensive endpoints are shedding load.
     """
+    throttle_classes = []
 
     def get(self, request):
         return Response({"status": "healthy"}, status=status.HTTP_200_OK)
 
 
 # 🆕 ADDED: Debug endpoint to check skills
-class DebugSkillsView(APIView):
+class DebugSkillsView(AdmissionControlMixin, APIView):
     """
     Debug endpoint to see all skills and users
     """
+    admission_gate = 'debug'
 
     def get(self, request):
         all_skills = list(Skill.objects.all().values('id', 'name'))
@@ -225,8 +521,11 @@ class DebugSkillsView(APIView):
 
         # Get users with their skills
         users_with_skills = []
-        for user in User.objects.all().prefetch_related('known_skills'):
-            user_skills = [skill.name for skill in user.known_skills.all()]
+        for user in User.objects.with_skills():
+            user_skills = [
+                membership.skill.name for membership in user.skill_memberships.all()
+                if membership.kind == UserSkill.KNOWN
+            ]
             users_with_skills.append({
                 'id': user.id,
                 'name': user.name,
@@ -239,3 +538,64 @@ class DebugSkillsView(APIView):
             'all_skills': all_skills,
             'users_with_skills': users_with_skills
         })
+
+
+class AdmissionStatsView(APIView):
+    """
+    Queue depth and reject counters for the admission gates and login
+    throttle of this worker process.
+    """
+    throttle_classes = []
+
+    def get(self, request):
+        return Response(admission_stats(), status=status.HTTP_200_OK)
+
+
+class ChangeFeedView(APIView):
+    """
+    Incremental sync for users, skills and hackathon experiences.
+
+    GET /api/changes/ without ``since`` returns only the current token: do a
+    full fetch, then poll with ?since=<next>. Each poll returns the current
+    state of everything changed after the token, ids deleted since then,
+    and the token to use next. Keep polling while ``has_more`` is true.
+    """
+
+    def get(self, request):
+        since = request.query_params.get('since')
+        try:
+            limit = query_int(request, 'limit', 500, minimum=1, maximum=5000)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if since is None:
+            return Response({'next': changefeed.latest_token()}, status=status.HTTP_200_OK)
+
+        try:
+            since = int(since)
+        except ValueError:
+            return Response(
+                {"error": "since must be a token returned by this endpoint"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        next_token, has_more, changes = changefeed.changes_since(since, limit)
+        objects, deleted = changefeed.load_changed_objects(changes)
+
+        experiences = HackathonExperienceSerializer(objects['experience'], many=True).data
+        for data, experience in zip(experiences, objects['experience']):
+            data['user_id'] = experience.user_id
+
+        return Response({
+            'since': since,
+            'next': next_token,
+            'has_more': has_more,
+            'users': UserSerializer(objects['user'], many=True).data,
+            'skills': SkillSerializer(objects['skill'], many=True).data,
+            'experiences': experiences,
+            'deleted': {
+                'users': deleted['user'],
+                'skills': deleted['skill'],
+                'experiences': deleted['experience'],
+            }
+        }, status=status.HTTP_200_OK)
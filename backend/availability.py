@@ -0,0 +1,170 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from . import changefeed
+from .background import closes_connections
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('username', 'email')
+
+
+class BloomFilter:
+    """
+    Set of strings with no false negatives and a false positive rate of
+    about ``error_rate`` while it holds at most ``capacity`` items.
+    Items can't be removed. ``count`` is the number of distinct items
+    added: re-adding one (every save of a user) sets no new bit and isn't
+    counted.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from one 128-bit digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        """Add ``item``. Returns False if it was (probably) already there."""
+        bits = self.bits
+        added = False
+        for position in self._positions(item):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[position >> 3] >> (position & 7) & 1 for position in self._positions(item))
+
+
+def _key(field, value):
+    return f"{field}:{value}"
+
+
+class AvailabilityIndex:
+    """
+    Per-process Bloom filter of every username and email.
+
+    Loaded once in a background thread; until then checks go straight to
+    the database. Users saved in this process are added by a post_save
+    receiver, users saved by other processes are picked up from the change
+    feed at most every settings.AVAILABILITY_REFRESH_SECONDS. Deleted or
+    renamed values stay in the filter and just cost a query.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._token = 0
+        self._refreshed = 0.0
+        self._loading = False
+
+    @property
+    def ready(self):
+        return self._filter is not None
+
+    def start_loading(self):
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+        threading.Thread(target=self._load_in_background, daemon=True, name='availability-load').start()
+
+    @closes_connections
+    def _load_in_background(self):
+        try:
+            self.load()
+        except Exception:
+            logger.exception("Loading the availability filter failed")
+            self._loading = False
+
+    def load(self):
+        """Build the filter from the user table. Also resizes a full filter."""
+        # Taken first: users written while we read are replayed by refresh().
+        token = changefeed.settled_token()
+        count = User.objects.count()
+        bloom = BloomFilter(
+            capacity=max(settings.AVAILABILITY_BLOOM_MIN_CAPACITY, 2 * count * len(FIELDS)),
+            error_rate=settings.AVAILABILITY_BLOOM_ERROR_RATE,
+        )
+        for values in User.objects.order_by().values_list(*FIELDS).iterator(chunk_size=5000):
+            for field, value in zip(FIELDS, values):
+                if value:
+                    bloom.add(_key(field, value))
+
+        with self._lock:
+            self._filter = bloom
+            self._token = token
+            self._refreshed = time.monotonic()
+            self._loading = False
+        logger.info(f"Availability filter loaded: {count} users, {bloom.size} bits, {bloom.hashes} hashes")
+
+    def remember(self, user):
+        if not self.ready:
+            return
+        with self._lock:
+            for field in FIELDS:
+                value = getattr(user, field)
+                if value:
+                    self._filter.add(_key(field, value))
+
+    def refresh(self):
+        """Add users changed by any process since the last refresh."""
+        with self._lock:
+            # Claim this refresh so concurrent requests don't repeat it.
+            token = self._token
+            self._refreshed = time.monotonic()
+
+        has_more = True
+        while has_more:
+            token, has_more, changes = changefeed.changes_since(token, 1000)
+            changed = [user_id for user_id, deleted in changes['user'].items() if not deleted]
+            users = User.objects.filter(id__in=changed).only('id', *FIELDS) if changed else []
+            for user in users:
+                self.remember(user)
+
+        with self._lock:
+            self._token = max(self._token, token)
+        if self._filter.count > self._filter.capacity:
+            self.start_loading()
+
+    def is_taken(self, field, value):
+        if not self.ready:
+            self.start_loading()
+            return User.objects.filter(**{field: value}).exists()
+
+        if time.monotonic() - self._refreshed > settings.AVAILABILITY_REFRESH_SECONDS:
+            self.refresh()
+        if _key(field, value) not in self._filter:
+            return False
+        # Possibly taken: only now ask the database.
+        return User.objects.filter(**{field: value}).exists()
+
+
+index = AvailabilityIndex()
+
+
+def check(**values):
+    """{field: {'value': ..., 'available': bool}} for the given usernames/emails."""
+    return {
+        field: {'value': value, 'available': not index.is_taken(field, value)}
+        for field, value in values.items()
+    }
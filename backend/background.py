@@ -0,0 +1,19 @@
+from functools import wraps
+
+from django.db import connections
+
+
+def closes_connections(func):
+    """
+    For the target of a background thread (or a task run on an executor):
+    closes the thread's database connections once ``func`` returns or
+    raises. Django only closes connections at the end of a request, so a
+    thread's own would otherwise stay open as long as the thread lives.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+    return wrapper
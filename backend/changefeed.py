@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChangeLogEntry, User, Skill, HackathonExperience
+
+
+def record(kind, object_ids, deleted=False):
+    """
+    Append change log entries for ``object_ids`` of ``kind``
+    ('user', 'skill' or 'experience') in one INSERT.
+
+    The INSERT runs once the surrounding transaction has committed (at
+    once in autocommit), so tokens follow commit order: a long transaction
+    can't end up behind a token clients have already moved past, and a
+    rolled-back write leaves no entry.
+    """
+    object_ids = list(object_ids)
+    if object_ids:
+        transaction.on_commit(lambda: _insert(kind, object_ids, deleted))
+
+
+def _insert(kind, object_ids, deleted):
+    now = timezone.now()
+    ChangeLogEntry.objects.bulk_create([
+        ChangeLogEntry(kind=kind, object_id=object_id, deleted=deleted, created_at=now)
+        for object_id in object_ids
+    ], batch_size=1000)
+
+
+def latest_token():
+    return ChangeLogEntry.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def _settle_cutoff():
+    settle = getattr(settings, 'CHANGEFEED_SETTLE_SECONDS', 2)
+    return timezone.now() - timedelta(seconds=settle)
+
+
+def settled_token():
+    """
+    Latest token outside the settle window. Use it instead of
+    latest_token() when reading current state directly: changes_since()
+    from here also replays the writes that may not have committed yet.
+    """
+    return (
+        ChangeLogEntry.objects.filter(created_at__lte=_settle_cutoff())
+        .order_by('-id').values_list('id', flat=True).first() or 0
+    )
+
+
+def changes_since(since, limit=500):
+    """
+    Coalesced changes after token ``since``, at most ``limit`` log entries.
+
+    Entries younger than settings.CHANGEFEED_SETTLE_SECONDS are held back so
+    an insert that took a lower id but became visible a moment later isn't
+    skipped.
+
+    Returns (next_token, has_more, {kind: {object_id: deleted}}).
+    """
+    entries = list(
+        ChangeLogEntry.objects
+        .filter(id__gt=since, created_at__lte=_settle_cutoff())
+        .order_by('id')
+        .values_list('id', 'kind', 'object_id', 'deleted')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    changes = {kind: {} for kind, _ in ChangeLogEntry.KIND_CHOICES}
+    for _, kind, object_id, deleted in entries:
+        # Later entries win, so an object created then deleted is a tombstone.
+        changes[kind][object_id] = deleted
+
+    next_token = entries[-1][0] if entries else since
+    return next_token, has_more, changes
+
+
+def load_changed_objects(changes):
+    """
+    Fetch current rows for the non-deleted ids in ``changes``. Ids whose
+    row is gone (deleted after this page) are turned into tombstones.
+    """
+    querysets = {
+        'user': User.objects.with_skills().prefetch_related("hackathon_experiences"),
+        'skill': Skill.objects.all(),
+        'experience': HackathonExperience.objects.all(),
+    }
+
+    objects, deleted = {}, {}
+    for kind, queryset in querysets.items():
+        live_ids = [object_id for object_id, is_deleted in changes[kind].items() if not is_deleted]
+        found = queryset.in_bulk(live_ids) if live_ids else {}
+        objects[kind] = [found[object_id] for object_id in live_ids if object_id in found]
+        deleted[kind] = sorted(
+            object_id for object_id, is_deleted in changes[kind].items()
+            if is_deleted or object_id not in found
+        )
+    return objects, deleted
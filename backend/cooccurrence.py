@@ -0,0 +1,138 @@
+import math
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from .models import User, SkillCooccurrence, UserSkill
+
+# Keeps the OR chains in update() well under SQLite's expression depth limit.
+PAIR_BATCH_SIZE = 200
+
+
+def _pairs(skill_ids):
+    ordered = sorted(skill_ids)
+    return {
+        (a, b)
+        for i, a in enumerate(ordered)
+        for b in ordered[i:]
+    }
+
+
+def apply_changes(before, after):
+    """
+    Update the matrix for users whose known skills went from ``before`` to
+    ``after`` (both {user_id: set(skill_ids)}, see memberships.skill_sets).
+    """
+    deltas = Counter()
+    for user_id in before.keys() | after.keys():
+        old_pairs = _pairs(before.get(user_id, ()))
+        new_pairs = _pairs(after.get(user_id, ()))
+        for pair in new_pairs - old_pairs:
+            deltas[pair] += 1
+        for pair in old_pairs - new_pairs:
+            deltas[pair] -= 1
+    _apply_deltas(deltas)
+
+
+def _apply_deltas(deltas):
+    deltas = {pair: delta for pair, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        SkillCooccurrence.objects.bulk_create(
+            [SkillCooccurrence(skill_a_id=a, skill_b_id=b) for (a, b), delta in deltas.items() if delta > 0],
+            ignore_conflicts=True
+        )
+
+        # One UPDATE per distinct delta value (almost always just +1 / -1).
+        pairs_by_delta = defaultdict(list)
+        for pair, delta in deltas.items():
+            pairs_by_delta[delta].append(pair)
+
+        for delta, pairs in pairs_by_delta.items():
+            for start in range(0, len(pairs), PAIR_BATCH_SIZE):
+                condition = _pair_condition(pairs[start:start + PAIR_BATCH_SIZE])
+                cells = SkillCooccurrence.objects.filter(condition)
+                # Clamped: a matrix that has drifted below the data must not
+                # go negative (count is a PositiveIntegerField).
+                cells.update(count=Greatest(F('count') + delta, 0))
+                if delta < 0:
+                    cells.filter(count=0).delete()
+
+
+def _pair_condition(pairs):
+    condition = Q()
+    for a, b in pairs:
+        condition |= Q(skill_a_id=a, skill_b_id=b)
+    return condition
+
+
+def related_skills(skill_id, limit=10, min_count=1):
+    """
+    Skills most associated with ``skill_id`` among users who know it.
+
+    lift = P(x, y) / (P(x) P(y)) and PMI = log2(lift); for a fixed skill
+    both give the same order, so results are ranked by lift, then by the
+    raw co-occurrence count.
+    """
+    cells = SkillCooccurrence.objects.filter(
+        Q(skill_a_id=skill_id) | Q(skill_b_id=skill_id)
+    ).values_list('skill_a_id', 'skill_b_id', 'count')
+
+    skill_count = 0
+    together = {}
+    for a, b, count in cells:
+        if a == b:
+            skill_count = count
+        elif count >= min_count:
+            together[b if a == skill_id else a] = count
+
+    if not skill_count or not together:
+        return []
+
+    other_counts = dict(
+        SkillCooccurrence.objects.filter(skill_a_id__in=together, skill_b_id=F('skill_a_id'))
+        .values_list('skill_a_id', 'count')
+    )
+    total_users = User.objects.count()
+
+    related = []
+    for other_id, count in together.items():
+        if not other_counts.get(other_id):
+            # Diagonal cell missing: the matrix is out of step, skip the pair.
+            continue
+        lift = count * total_users / (skill_count * other_counts[other_id])
+        related.append({
+            'skill_id': other_id,
+            'count': count,
+            'lift': round(lift, 4),
+            'pmi': round(math.log2(lift), 4),
+        })
+    related.sort(key=lambda item: (-item['lift'], -item['count'], item['skill_id']))
+    return related[:limit]
+
+
+def rebuild():
+    """
+    Recompute the whole matrix with one set-based self-join of the
+    known UserSkill rows, GROUP BY skill pair, instead of walking users.
+    Returns the number of stored cells.
+    """
+    memberships = UserSkill._meta.db_table
+    table = SkillCooccurrence._meta.db_table
+    with transaction.atomic():
+        SkillCooccurrence.objects.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {table} (skill_a_id, skill_b_id, count)
+                SELECT a.skill_id, b.skill_id, COUNT(*)
+                FROM {memberships} a
+                JOIN {memberships} b
+                  ON b.user_id = a.user_id AND b.kind = a.kind AND b.skill_id >= a.skill_id
+                WHERE a.kind = %s
+                GROUP BY a.skill_id, b.skill_id
+            """, [UserSkill.KNOWN])
+    return SkillCooccurrence.objects.count()
@@ -0,0 +1,118 @@
+import re
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections, router
+from django.db.models import Count, Q
+from django.db.models.functions import Greatest
+
+from .models import User, UserTrigram
+
+
+LOOKUP_FIELDS = ('name', 'username', 'college_name')
+
+# Share of the query's trigrams a user must contain to match (non-Postgres).
+MIN_SCORE = 0.5
+
+WORD_RE = re.compile(r'\w+')
+
+
+def trigrams(text, prefix=False):
+    """
+    pg_trgm style trigrams: lowercase words padded with two leading spaces
+    and one trailing space. With ``prefix`` the last word is treated as
+    still being typed and gets no trailing space.
+    """
+    words = WORD_RE.findall((text or '').lower())
+    grams = set()
+    for index, word in enumerate(words):
+        padded = f"  {word}" if prefix and index == len(words) - 1 else f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def user_trigrams(user):
+    grams = set()
+    for field in LOOKUP_FIELDS:
+        grams |= trigrams(getattr(user, field))
+    return grams
+
+
+def uses_pg_trgm(using):
+    return connections[using].vendor == 'postgresql'
+
+
+def index_users(user_ids):
+    """
+    Rebuild the UserTrigram rows of ``user_ids``. No-op on Postgres, where
+    the GIN indexes maintain themselves.
+    """
+    using = router.db_for_write(UserTrigram)
+    if uses_pg_trgm(using) or not user_ids:
+        return
+    users = User.objects.using(using).filter(id__in=user_ids).only('id', *LOOKUP_FIELDS)
+    UserTrigram.objects.using(using).filter(user_id__in=user_ids).delete()
+    UserTrigram.objects.using(using).bulk_create([
+        UserTrigram(user_id=user.id, trigram=gram)
+        for user in users
+        for gram in user_trigrams(user)
+    ], batch_size=2000)
+
+
+def lookup_users(query, limit=10):
+    """
+    Users whose name, username or college contains something like
+    ``query``, best match first. Returns dicts with a ``score`` in [0, 1].
+    """
+    query_grams = trigrams(query, prefix=True)
+    if not query_grams:
+        return []
+
+    using = router.db_for_read(User)
+    if uses_pg_trgm(using):
+        return _lookup_pg_trgm(query, limit, using)
+    return _lookup_trigram_table(query, query_grams, limit, using)
+
+
+def _lookup_pg_trgm(query, limit, using):
+    # `<%` (word similarity) on each column can use its gin_trgm_ops index;
+    # see migration 0008.
+    matches = Q()
+    for field in LOOKUP_FIELDS:
+        matches |= Q(**{f'{field}__trigram_word_similar': query})
+    users = (
+        User.objects.using(using)
+        .filter(matches)
+        .annotate(score=Greatest(*(TrigramWordSimilarity(query, field) for field in LOOKUP_FIELDS)))
+        .order_by('-score', 'id')
+        .values('id', 'username', 'name', 'college_name', 'score')[:limit]
+    )
+    return list(users)
+
+
+def _lookup_trigram_table(query, query_grams, limit, using):
+    needed = max(1, int(len(query_grams) * MIN_SCORE + 0.999))
+    # Shortlist by shared-trigram count from the (trigram, user) index, then
+    # score the shortlist per field.
+    candidate_ids = list(
+        UserTrigram.objects.using(using)
+        .filter(trigram__in=query_grams)
+        .values('user_id')
+        .annotate(shared=Count('id'))
+        .filter(shared__gte=needed)
+        .order_by('-shared', 'user_id')
+        .values_list('user_id', flat=True)[:limit * 5]
+    )
+
+    # Whole-word trigrams break ties, so "ankit" ranks Ankit above Ankita.
+    word_grams = trigrams(' '.join(WORD_RE.findall(query.lower())))
+
+    results = []
+    for user in User.objects.using(using).filter(id__in=candidate_ids).values('id', 'username', 'name', 'college_name'):
+        field_grams = [trigrams(user[field]) for field in LOOKUP_FIELDS]
+        score = max(len(query_grams & grams) / len(query_grams) for grams in field_grams)
+        if score >= MIN_SCORE:
+            word_score = max(len(word_grams & grams) for grams in field_grams)
+            results.append((word_score, {**user, 'score': round(score, 4)}))
+
+    results.sort(key=lambda item: (-item[1]['score'], -item[0], len(item[1]['name'] or ''), item[1]['id']))
+    return [user for _, user in results[:limit]]
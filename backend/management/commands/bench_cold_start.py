@@ -0,0 +1,122 @@
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ByteBrigade_Backend import gunicorn_conf
+
+MODES = {
+    # Same worker class and threads as gunicorn_conf, so only the warm start
+    # differs: app imported lazily by each worker, nothing warmed
+    'cold': ['ByteBrigade_Backend.wsgi:application',
+             '--worker-class', gunicorn_conf.worker_class, '--threads', str(gunicorn_conf.threads)],
+    # preload + per-worker warm-up (ByteBrigade_Backend/gunicorn_conf.py)
+    'warm': ['-c', 'python:ByteBrigade_Backend.gunicorn_conf'],
+}
+
+# What a load balancer would poll before routing traffic to the server.
+READY_PATHS = {
+    'cold': '/api/health/',
+    'warm': '/api/health/ready/',
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get(url, timeout=30):
+    """(status, seconds) for one GET; status is None if nothing is listening yet."""
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            code = response.status
+    except urllib.error.HTTPError as exc:
+        code = exc.code
+    except (urllib.error.URLError, ConnectionError):
+        code = None
+    return code, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = "Benchmark gunicorn time-to-first-request and first-request latency, cold vs warm start"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append', dest='paths',
+                            help="Endpoint to time (repeatable). Default: /api/skills/ and /api/users/?limit=20")
+        parser.add_argument('--runs', type=int, default=3)
+        parser.add_argument('--concurrency', type=int, default=gunicorn_conf.threads,
+                            help="Simultaneous GETs per path, so the first reaches each request thread. "
+                                 "Default: GUNICORN_THREADS")
+        parser.add_argument('--startup-timeout', type=float, default=60.0)
+
+    def _run_once(self, mode, paths, startup_timeout, concurrency):
+        port = free_port()
+        base = f"http://127.0.0.1:{port}"
+        command = [
+            sys.executable, '-m', 'gunicorn', *MODES[mode],
+            '--bind', f"127.0.0.1:{port}", '--workers', '1', '--log-level', 'warning',
+        ]
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)}
+
+        started = time.perf_counter()
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                code, _ = get(base + READY_PATHS[mode], timeout=startup_timeout)
+                if code == 200:
+                    break
+                if server.poll() is not None:
+                    raise CommandError(f"gunicorn ({mode}) exited with status {server.returncode}")
+                if time.perf_counter() - started > startup_timeout:
+                    raise CommandError(f"gunicorn ({mode}) wasn't ready after {startup_timeout}s")
+                time.sleep(0.01)
+            ready = time.perf_counter() - started
+
+            # Database connections are per thread: the first round of
+            # ``concurrency`` GETs is the first request on each thread.
+            first, second = {}, {}
+            with ThreadPoolExecutor(concurrency) as executor:
+                for path in paths:
+                    responses = list(executor.map(get, [base + path] * concurrency))
+                    if any(code != 200 for code, _ in responses):
+                        raise CommandError(f"GET {path} returned {[code for code, _ in responses]}")
+                    first[path] = [seconds for _, seconds in responses]
+                for path in paths:
+                    second[path] = [seconds for _, seconds in executor.map(get, [base + path] * concurrency)]
+            return ready, first, second
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or ['/api/skills/', '/api/users/?limit=20']
+        runs = options['runs']
+        concurrency = options['concurrency']
+
+        for mode in MODES:
+            results = [self._run_once(mode, paths, options['startup_timeout'], concurrency) for _ in range(runs)]
+            ready = statistics.median(result[0] for result in results)
+
+            self.stdout.write(f"{mode} start (gunicorn, 1 worker, {gunicorn_conf.threads} threads, "
+                              f"{concurrency} concurrent GETs, median of {runs})")
+            first_response = statistics.median(result[0] + max(result[1][paths[0]]) for result in results)
+            self.stdout.write(f"  ready ({READY_PATHS[mode]}): {ready * 1000:8.1f} ms after spawn")
+            self.stdout.write(f"  all first responses ({paths[0]}): {first_response * 1000:8.1f} ms after spawn")
+            for path in paths:
+                first = [statistics.median(f(result[1][path]) for result in results) for f in (statistics.median, max)]
+                second = [statistics.median(f(result[2][path]) for result in results) for f in (statistics.median, max)]
+                self.stdout.write(f"  GET {path}: first {first[0] * 1000:7.1f} ms (max {first[1] * 1000:7.1f}), "
+                                  f"second {second[0] * 1000:7.1f} ms (max {second[1] * 1000:7.1f})")
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+
+
+# The middleware/DRF setup every /api/ request went through before
+# BrowserOnlyMiddleware and the JSON-only REST_FRAMEWORK settings.
+LEGACY_MIDDLEWARE = [
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+LEGACY_REST_FRAMEWORK = {}
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark per-request middleware/DRF overhead on an /api/ endpoint (legacy vs current settings)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/health/')
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--warmup', type=int, default=200)
+
+    def _run(self, path, count, warmup):
+        client = Client()
+        for _ in range(warmup):
+            client.get(path)
+        start = time.perf_counter()
+        for _ in range(count):
+            client.get(path)
+        return (time.perf_counter() - start) / count
+
+    def handle(self, *args, **options):
+        path = options['path']
+        count = options['requests']
+        warmup = options['warmup']
+
+        with override_settings(MIDDLEWARE=LEGACY_MIDDLEWARE, REST_FRAMEWORK=LEGACY_REST_FRAMEWORK):
+            legacy = self._run(path, count, warmup)
+        current = self._run(path, count, warmup)
+
+        self.stdout.write(f"GET {path} x {count}")
+        self.stdout.write(f"  legacy stack : {legacy * 1e6:8.1f} us/request")
+        self.stdout.write(f"  current stack: {current * 1e6:8.1f} us/request")
+        if legacy:
+            self.stdout.write(f"  saved        : {(1 - current / legacy) * 100:5.1f}%")
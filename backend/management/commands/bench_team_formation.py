@@ -0,0 +1,50 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend import teams
+
+
+class Command(BaseCommand):
+    help = "Benchmark the team formation solver on a synthetic participant pool (no database)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participants', type=int, default=10000)
+        parser.add_argument('--team-size', type=int, default=4)
+        parser.add_argument('--skills', type=int, default=60)
+        parser.add_argument('--required', type=int, default=4, help="Number of required skills")
+        parser.add_argument('--beginner-ratio', type=float, default=0.3)
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        skills = list(range(options['skills']))
+        # Skill popularity is long-tailed: a few very common, many rare.
+        weights = [1 / (rank + 1) for rank in skills]
+        participants = [
+            (
+                user_id,
+                frozenset(rng.choices(skills, weights=weights, k=rng.randint(1, 6))),
+                rng.random() < options['beginner_ratio'],
+            )
+            for user_id in range(options['participants'])
+        ]
+        required = rng.sample(skills[:options['skills'] // 4], options['required'])
+
+        self.stdout.write(
+            f"{options['participants']} participants, team size {options['team_size']}, "
+            f"{options['required']} required skills"
+        )
+        for label, kwargs in [('greedy only', {'workers': 1, 'iterations_per_member': 0})] + [
+            (f'greedy + local search, {workers} worker(s)', {'workers': workers})
+            for workers in options['workers']
+        ]:
+            start = time.perf_counter()
+            solution = teams.solve(participants, options['team_size'], required, **kwargs)
+            elapsed = time.perf_counter() - start
+            stats = teams.summarize(solution, participants, required)
+            self.stdout.write(f"{label}: {elapsed:.2f}s")
+            self.stdout.write(json.dumps(stats))
@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from backend import team_jobs
+
+
+class Command(BaseCommand):
+    help = "Partition all users (or a cohort) into teams that maximize skill coverage"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--team-size', type=int, default=4)
+        parser.add_argument('--required', default='', help="Comma separated skill names teams should cover")
+        parser.add_argument('--college', help="Only users from this college")
+        parser.add_argument('--year', type=int, help="Only users in this year")
+        parser.add_argument('--workers', type=int, help="Solver processes (default: CPU count)")
+        parser.add_argument('--output', help="Write the teams as JSON to this file")
+
+    def handle(self, *args, **options):
+        user_filter = {
+            key: options[key] for key in ('college', 'year') if options[key] is not None
+        }
+        required = [s.strip() for s in options['required'].split(',') if s.strip()]
+
+        result = team_jobs.form_teams(
+            options['team_size'], required, user_filter or None, workers=options['workers']
+        )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(result, f)
+            self.stdout.write(f"Wrote {len(result['teams'])} teams to {options['output']}")
+        self.stdout.write(json.dumps(result['stats'], indent=2))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from backend import cooccurrence
+
+
+class Command(BaseCommand):
+    help = "Rebuild the skill co-occurrence matrix from known skills in one set-based pass"
+
+    def handle(self, *args, **options):
+        cells = cooccurrence.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt skill co-occurrence matrix: {cells} cells"))
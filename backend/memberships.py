@@ -0,0 +1,83 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from . import cooccurrence
+from .models import Skill, UserSkill
+
+
+def normalize(names):
+    """Skill names as stored: stripped and capitalized, blanks dropped."""
+    return {name.strip().capitalize() for name in names if name and name.strip()}
+
+
+def get_or_create_skills(names):
+    """{name: skill_id} for ``names``, creating the missing skills in one insert."""
+    if not names:
+        return {}
+    skill_ids = dict(Skill.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = set(names) - skill_ids.keys()
+    if missing:
+        Skill.objects.bulk_create([Skill(name=name) for name in missing], ignore_conflicts=True)
+        skill_ids.update(Skill.objects.filter(name__in=missing).values_list('name', 'id'))
+    return skill_ids
+
+
+def skill_sets(user_ids, kind):
+    """
+    {user_id: set(skill_ids)} of one kind for ``user_ids`` (ids, or a
+    queryset of ids, used as a subquery), in one query. Users without
+    such skills get an empty set.
+    """
+    skill_sets = defaultdict(set)
+    rows = UserSkill.objects.filter(kind=kind, user_id__in=user_ids).values_list('user_id', 'skill_id')
+    for user_id, skill_id in rows:
+        skill_sets[user_id].add(skill_id)
+    return skill_sets
+
+
+def change_skills(kind, add=None, remove=None):
+    """
+    Add and remove skills of one kind for many users: ``add`` and ``remove``
+    map user_id -> skill ids. One bulk INSERT, plus one DELETE per distinct
+    set of removed skills.
+
+    These writes send no signals, so the co-occurrence matrix is updated
+    here; callers record the users in the change feed (saving the user
+    does that).
+    """
+    add = {user_id: skill_ids for user_id, skill_ids in (add or {}).items() if skill_ids}
+    remove = {user_id: skill_ids for user_id, skill_ids in (remove or {}).items() if skill_ids}
+    user_ids = add.keys() | remove.keys()
+    if not user_ids:
+        return
+
+    with transaction.atomic():
+        if kind == UserSkill.KNOWN:
+            before = skill_sets(user_ids, kind)
+
+        groups = {}
+        for user_id, skill_ids in remove.items():
+            groups.setdefault(frozenset(skill_ids), []).append(user_id)
+        for skill_ids, group in groups.items():
+            UserSkill.objects.filter(kind=kind, user_id__in=group, skill_id__in=skill_ids).delete()
+
+        UserSkill.objects.bulk_create(
+            [
+                UserSkill(user_id=user_id, skill_id=skill_id, kind=kind)
+                for user_id, skill_ids in add.items()
+                for skill_id in skill_ids
+            ],
+            ignore_conflicts=True,
+            batch_size=1000
+        )
+
+        if kind == UserSkill.KNOWN:
+            cooccurrence.apply_changes(before, skill_sets(user_ids, kind))
+
+
+def set_skills(user_id, kind, names):
+    """Replace a user's skills of ``kind`` with the skills named ``names``."""
+    target = set(get_or_create_skills(normalize(names)).values())
+    current = skill_sets([user_id], kind)[user_id]
+    change_skills(kind, add={user_id: target - current}, remove={user_id: current - target})
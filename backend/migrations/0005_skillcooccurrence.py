@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_matrix(apps, schema_editor):
+    # Same self-join as cooccurrence.rebuild(), over the known_skills table
+    # as it is at this migration.
+    User = apps.get_model('backend', 'User')
+    SkillCooccurrence = apps.get_model('backend', 'SkillCooccurrence')
+    through = User._meta.get_field('known_skills').remote_field.through._meta.db_table
+    schema_editor.execute(f"""
+        INSERT INTO {SkillCooccurrence._meta.db_table} (skill_a_id, skill_b_id, count)
+        SELECT a.skill_id, b.skill_id, COUNT(*)
+        FROM {through} a
+        JOIN {through} b ON b.user_id = a.user_id AND b.skill_id >= a.skill_id
+        GROUP BY a.skill_id, b.skill_id
+    """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0004_changelogentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillCooccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('skill_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='backend.skill')),
+                ('skill_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='backend.skill')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='skillcooccurrence',
+            constraint=models.UniqueConstraint(fields=('skill_a', 'skill_b'), name='unique_skill_pair'),
+        ),
+        migrations.RunPython(fill_matrix, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:26
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Copied from backend.lookup as of this migration, so later changes to that
+# module can't change what the migration does.
+LOOKUP_FIELDS = ('name', 'username', 'college_name')
+
+WORD_RE = re.compile(r'\w+')
+
+
+def trigrams(text):
+    grams = set()
+    for word in WORD_RE.findall((text or '').lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Postgres: GIN trigram indexes used by /api/users/lookup/
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for field in LOOKUP_FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS backend_user_{field}_trgm '
+            f'ON backend_user USING gin ({field} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in LOOKUP_FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS backend_user_{field}_trgm')
+
+
+def index_existing_users(apps, schema_editor):
+    # Everywhere else: fill the UserTrigram table
+    if schema_editor.connection.vendor == 'postgresql':
+        return
+    User = apps.get_model('backend', 'User')
+    UserTrigram = apps.get_model('backend', 'UserTrigram')
+    db = schema_editor.connection.alias
+    rows = []
+    for user in User.objects.using(db).only('id', *LOOKUP_FIELDS).iterator():
+        grams = set()
+        for field in LOOKUP_FIELDS:
+            grams |= trigrams(getattr(user, field))
+        rows.extend(UserTrigram(user_id=user.id, trigram=gram) for gram in grams)
+    UserTrigram.objects.using(db).bulk_create(rows, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0007_teamformationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='backend.user')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='usertrigram',
+            constraint=models.UniqueConstraint(fields=('trigram', 'user'), name='unique_user_trigram'),
+        ),
+        migrations.RunPython(index_existing_users, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
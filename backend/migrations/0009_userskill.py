@@ -0,0 +1,102 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# old M2M field -> UserSkill.kind; my_skills was a copy of known_skills
+SOURCES = [
+    ('known_skills', 'known'),
+    ('my_skills', 'known'),
+    ('desired_skills', 'desired'),
+]
+
+
+def _through_table(User, field):
+    return User._meta.get_field(field).remote_field.through._meta.db_table
+
+
+def copy_to_userskill(apps, schema_editor):
+    User = apps.get_model('backend', 'User')
+    UserSkill = apps.get_model('backend', 'UserSkill')
+    table = UserSkill._meta.db_table
+    for kind in ('known', 'desired'):
+        # UNION drops the known_skills/my_skills duplicates
+        selects = ' UNION '.join(
+            f"SELECT user_id, skill_id FROM {_through_table(User, field)}"
+            for field, source_kind in SOURCES if source_kind == kind
+        )
+        schema_editor.execute(
+            f"INSERT INTO {table} (user_id, skill_id, kind) "
+            f"SELECT user_id, skill_id, '{kind}' FROM ({selects}) memberships"
+        )
+
+
+def refill_matrix(apps, schema_editor):
+    # Known skills are now known_skills UNION my_skills, so recount the
+    # co-occurrence matrix from the copied rows (cooccurrence.rebuild()).
+    UserSkill = apps.get_model('backend', 'UserSkill')
+    SkillCooccurrence = apps.get_model('backend', 'SkillCooccurrence')
+    memberships = UserSkill._meta.db_table
+    table = SkillCooccurrence._meta.db_table
+    schema_editor.execute(f"DELETE FROM {table}")
+    schema_editor.execute(f"""
+        INSERT INTO {table} (skill_a_id, skill_b_id, count)
+        SELECT a.skill_id, b.skill_id, COUNT(*)
+        FROM {memberships} a
+        JOIN {memberships} b
+          ON b.user_id = a.user_id AND b.kind = a.kind AND b.skill_id >= a.skill_id
+        WHERE a.kind = 'known'
+        GROUP BY a.skill_id, b.skill_id
+    """)
+
+
+def copy_from_userskill(apps, schema_editor):
+    User = apps.get_model('backend', 'User')
+    UserSkill = apps.get_model('backend', 'UserSkill')
+    table = UserSkill._meta.db_table
+    for field, kind in SOURCES:
+        schema_editor.execute(
+            f"INSERT INTO {_through_table(User, field)} (user_id, skill_id) "
+            f"SELECT user_id, skill_id FROM {table} WHERE kind = '{kind}'"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0008_user_trigram_lookup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('known', 'Known'), ('desired', 'Desired')], max_length=10)),
+                ('skill', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='backend.skill')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='skill_memberships', to='backend.user')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['skill', 'kind', 'user'], name='userskill_skill_kind_user_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='userskill',
+            constraint=models.UniqueConstraint(fields=('user', 'kind', 'skill'), name='unique_user_skill_kind'),
+        ),
+        migrations.RunPython(copy_to_userskill, copy_from_userskill),
+        migrations.RunPython(refill_matrix, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='user',
+            name='desired_skills',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='known_skills',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='my_skills',
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+
+# Admin search (UserAdmin.search_fields) on username/email (=, iexact) and
+# name/college_name (^, istartswith): Django compiles these to
+# UPPER(col) = UPPER(%s) and UPPER(col) LIKE UPPER(%s), which plain column
+# indexes can't serve. text_pattern_ops makes the prefix LIKE indexable
+# under any collation and still serves equality.
+SEARCH_FIELDS = ('username', 'email', 'name', 'college_name')
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS backend_user_{field}_upper '
+            f'ON backend_user (UPPER({field}) text_pattern_ops)'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS backend_user_{field}_upper')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0009_userskill'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['year'], name='user_year_idx'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -13,6 +13,15 @@ class Skill(models.Model):
     class Meta:
         ordering = ['name']
 
+class UserQuerySet(models.QuerySet):
+    def with_skills(self):
+        """Prefetch skill memberships, with skill names, for UserSerializer."""
+        return self.prefetch_related(models.Prefetch(
+            'skill_memberships',
+            queryset=UserSkill.objects.select_related('skill').order_by('skill__name')
+        ))
+
+
 class User(models.Model):
     GENDER_CHOICES = [
         ('male', 'Male'),
@@ -32,22 +41,19 @@ class User(models.Model):
     email = models.EmailField(unique=True)
     gender = models.CharField(max_length=20, choices=GENDER_CHOICES, blank=True, null=True)
 
-    # Skills
-    my_skills = models.ManyToManyField(Skill, related_name="users", blank=True)
-
     # Social links
     linkedin_url = models.URLField(max_length=200, blank=True, null=True)
     github_url = models.URLField(max_length=200, blank=True, null=True)
 
     # Additional fields from frontend
     is_beginner = models.BooleanField(default=False)
-    known_skills = models.ManyToManyField(Skill, related_name="known_by_users", blank=True)
-    desired_skills = models.ManyToManyField(Skill, related_name="desired_by_users", blank=True)
 
     # Timestamps
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
 
+    objects = UserQuerySet.as_manager()
+
     def set_password(self, raw_password):
         self.password = make_password(raw_password)
 
@@ -59,6 +65,45 @@ class User(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # default ordering for the user list and admin changelist
+            models.Index(fields=['-created_at'], name='user_created_at_idx'),
+            # admin year filter: SELECT DISTINCT year and WHERE year = ...
+            models.Index(fields=['year'], name='user_year_idx'),
+        ]
+
+class UserSkill(models.Model):
+    """
+    A skill a user knows or wants to learn: one row per (user, kind, skill).
+    Replaces the my_skills, known_skills and desired_skills M2M tables
+    (my_skills was always a copy of known_skills). Write through
+    backend.memberships so the co-occurrence matrix stays in step.
+    """
+    KNOWN = 'known'
+    DESIRED = 'desired'
+    KIND_CHOICES = [
+        (KNOWN, 'Known'),
+        (DESIRED, 'Desired'),
+    ]
+
+    # Both covered by the composite indexes below, so no single-column ones.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='skill_memberships', db_index=False)
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='memberships', db_index=False)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+
+    def __str__(self):
+        return f"{self.user_id} {self.kind} {self.skill_id}"
+
+    class Meta:
+        constraints = [
+            # a user's skills of one kind
+            models.UniqueConstraint(fields=['user', 'kind', 'skill'], name='unique_user_skill_kind'),
+        ]
+        indexes = [
+            # users with a skill: search, facets, co-occurrence
+            models.Index(fields=['skill', 'kind', 'user'], name='userskill_skill_kind_user_idx'),
+        ]
+
 
 #  HackathonExperience
 class HackathonExperience(models.Model):
@@ -76,3 +121,97 @@ class HackathonExperience(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Hackathon Experience'
         verbose_name_plural = 'Hackathon Experiences'
+
+
+class SkillCooccurrence(models.Model):
+    """
+    Sparse, symmetric skill x skill matrix over known UserSkill rows: how many
+    users know both skills. Only the upper triangle (skill_a <= skill_b) of
+    non-zero cells is stored; the diagonal (skill_a == skill_b) holds the
+    number of users who know the skill.
+    """
+    skill_a = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='+')
+    skill_b = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.skill_a_id} x {self.skill_b_id}: {self.count}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['skill_a', 'skill_b'], name='unique_skill_pair'),
+        ]
+
+
+class UserTrigram(models.Model):
+    """
+    Trigram posting list for /api/users/lookup/ on databases without
+    pg_trgm (SQLite in development): one row per distinct trigram of a
+    user's name, username and college_name. Unused on Postgres, which
+    searches GIN trigram indexes on the user table directly.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    trigram = models.CharField(max_length=3)
+
+    def __str__(self):
+        return f"{self.trigram!r} -> {self.user_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['trigram', 'user'], name='unique_user_trigram'),
+        ]
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only log of writes to users, skills and hackathon experiences,
+    read by /api/changes/. The auto-increment primary key is the feed token,
+    so polling is an index range scan on id.
+    """
+    KIND_CHOICES = [
+        ('user', 'User'),
+        ('skill', 'Skill'),
+        ('experience', 'Hackathon Experience'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        action = 'deleted' if self.deleted else 'changed'
+        return f"#{self.id} {self.kind} {self.object_id} {action}"
+
+    class Meta:
+        ordering = ['id']
+
+
+class TeamFormationJob(models.Model):
+    """
+    A background run of the team formation solver (backend.teams) over the
+    whole participant pool or a cohort. ``result`` holds the teams as lists
+    of user ids plus coverage statistics. A running job's thread refreshes
+    ``heartbeat_at``; one that stops doing so was lost to a restart.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    params = models.JSONField(default=dict)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Team formation #{self.id} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
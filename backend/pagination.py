@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_count(queryset):
+    """
+    Row count for ``queryset`` that avoids COUNT(*) over big tables.
+
+    For an unfiltered queryset on Postgres this uses the planner's row
+    estimate (pg_class.reltuples), which is kept current by autovacuum /
+    ANALYZE. Filtered querysets, other databases and tables estimated below
+    settings.EXACT_COUNT_THRESHOLD rows get an exact count.
+    """
+    query = queryset.query
+    connection = connections[queryset.db]
+    unfiltered = (
+        not query.where
+        and not query.distinct
+        and not query.combinator
+        and query.low_mark == 0
+        and query.high_mark is None
+    )
+
+    if unfiltered and connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 (or 0 on old servers) until the table is analyzed.
+        if row and row[0] >= settings.EXACT_COUNT_THRESHOLD:
+            return row[0]
+
+    return queryset.count()
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator whose count comes from estimated_count(), so paging through a
+    large table doesn't run COUNT(*) on every page. Page numbers near the
+    end may be slightly off while the estimate is stale.
+    """
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'query'):
+            return estimated_count(self.object_list)
+        return len(self.object_list)
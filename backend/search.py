@@ -0,0 +1,181 @@
+from django.db import connections, router
+from django.db.models import Count, Q, Window
+from django.db.models.expressions import RawSQL
+
+from .models import User, Skill, UserSkill
+from .pagination import estimated_count
+
+
+SEARCH_MODES = ('any', 'all')
+
+
+def parse_skill_list(skills_param):
+    return [s.strip() for s in (skills_param or '').split(',') if s.strip()]
+
+
+def resolve_skill_ids(skill_names):
+    """
+    Case-insensitive lookup of skill names in one query.
+    Returns (skill_ids, missing_names).
+    """
+    if not skill_names:
+        return [], []
+    query = Q()
+    for name in skill_names:
+        query |= Q(name__iexact=name)
+    found = dict(Skill.objects.filter(query).values_list('id', 'name'))
+    found_names = {name.lower() for name in found.values()}
+    missing = [name for name in skill_names if name.lower() not in found_names]
+    return list(found), missing
+
+
+def _held_sql(skill_ids):
+    """(user_id, skill_id) rows for users who know one of the given skills."""
+    memberships = UserSkill._meta.db_table
+    placeholders = ', '.join(['%s'] * len(skill_ids))
+    sql = f"SELECT user_id, skill_id FROM {memberships} WHERE skill_id IN ({placeholders}) AND kind = %s"
+    return sql, [*skill_ids, UserSkill.KNOWN]
+
+
+def _min_matched(skill_ids, mode):
+    return len(skill_ids) if mode == 'all' else 1
+
+
+def filtered_users(skill_names, mode='all', include_beginner=True):
+    """
+    Unranked queryset of the users UserSearchView would return, for
+    aggregating over (e.g. facet counts).
+    """
+    users = User.objects.all()
+    if skill_names:
+        skill_ids, missing = resolve_skill_ids(skill_names)
+        if not skill_ids or (mode == 'all' and missing):
+            return User.objects.none()
+        held_sql, params = _held_sql(skill_ids)
+        users = users.filter(id__in=RawSQL(
+            f"SELECT user_id FROM ({held_sql}) held GROUP BY user_id HAVING COUNT(*) >= %s",
+            [*params, _min_matched(skill_ids, mode)]
+        ))
+    if not include_beginner:
+        users = users.filter(is_beginner=False)
+    return users
+
+
+def ranked_user_search(skill_ids, mode='all', include_beginner=True, skip=0, limit=100):
+    """
+    Rank users by how many of ``skill_ids`` they know, with users who want
+    a skill they're missing (desired) ranked higher among equal matches.
+
+    A single GROUP BY/COUNT query over the UserSkill (skill, kind, user)
+    index returns the requested page together with the total number of
+    matches.
+
+    Returns (total, [(user_id, matched, wanted), ...]).
+    """
+    if not skill_ids:
+        return 0, []
+
+    memberships = UserSkill._meta.db_table
+    users = User._meta.db_table
+
+    held_sql, held_params = _held_sql(skill_ids)
+    placeholders = ', '.join(['%s'] * len(skill_ids))
+    beginner_clause = '' if include_beginner else 'WHERE u.is_beginner = %s'
+
+    sql = f"""
+        WITH held AS ({held_sql}),
+        matched AS (
+            SELECT user_id, COUNT(*) AS matched
+            FROM held
+            GROUP BY user_id
+            HAVING COUNT(*) >= %s
+        ),
+        wanted AS (
+            SELECT d.user_id, COUNT(*) AS wanted
+            FROM {memberships} d
+            WHERE d.skill_id IN ({placeholders}) AND d.kind = %s
+              AND NOT EXISTS (
+                  SELECT 1 FROM held h
+                  WHERE h.user_id = d.user_id AND h.skill_id = d.skill_id
+              )
+            GROUP BY d.user_id
+        )
+        SELECT m.user_id, m.matched, COALESCE(w.wanted, 0) AS wanted,
+               COUNT(*) OVER () AS total
+        FROM matched m
+        JOIN {users} u ON u.id = m.user_id
+        LEFT JOIN wanted w ON w.user_id = m.user_id
+        {beginner_clause}
+        ORDER BY m.matched DESC, wanted DESC, u.created_at DESC, u.id
+        LIMIT %s OFFSET %s
+    """
+    params = [*held_params, _min_matched(skill_ids, mode), *skill_ids, UserSkill.DESIRED]
+    if not include_beginner:
+        params.append(False)
+    params.extend([limit, skip])
+
+    # Raw SQL skips the database router; ask it so reads can use a replica.
+    with connections[router.db_for_read(User)].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    if rows:
+        total = rows[0][3]
+    elif skip:
+        # Page past the end: the window count has nothing to ride on.
+        total = ranked_user_search(skill_ids, mode, include_beginner, 0, 1)[0]
+    else:
+        total = 0
+    return total, [(user_id, matched, wanted) for user_id, matched, wanted, _ in rows]
+
+
+def facet_counts(users, facet_limit=20):
+    """
+    Counts per college, year, gender, beginner flag and known skill for the
+    ``users`` queryset, from one grouped aggregate query per facet.
+    """
+    def grouped(field, limit=None):
+        rows = users.order_by().values(field).annotate(count=Count('id')).order_by('-count', field)
+        if limit:
+            rows = rows[:limit]
+        return [{'value': row[field], 'count': row['count']} for row in rows]
+
+    beginner = grouped('is_beginner')
+
+    skill_rows = list(
+        UserSkill.objects
+        .filter(kind=UserSkill.KNOWN, user_id__in=users.order_by().values('id'))
+        .values('skill_id', 'skill__name')
+        .annotate(count=Count('user_id'))
+        .order_by('-count', 'skill__name')[:facet_limit]
+    )
+
+    return {
+        # every user is either a beginner or not, so this is the total
+        'total': sum(row['count'] for row in beginner),
+        'college_name': grouped('college_name', facet_limit),
+        'year': grouped('year'),
+        'gender': grouped('gender'),
+        'is_beginner': beginner,
+        'skills': [
+            {'id': row['skill_id'], 'name': row['skill__name'], 'count': row['count']}
+            for row in skill_rows
+        ],
+    }
+
+
+def paginate_with_total(queryset, skip=0, limit=100):
+    """
+    Slice ``queryset`` and get the unpaginated count from the same query
+    using a window aggregate. Returns (total, [objects]).
+
+    An unfiltered queryset is counted with estimated_count() instead, which
+    avoids scanning the whole table on large databases.
+    """
+    if not queryset.query.where:
+        return estimated_count(queryset), list(queryset[skip:skip + limit])
+
+    page = list(queryset.annotate(search_total=Window(expression=Count('pk')))[skip:skip + limit])
+    if page:
+        return page[0].search_total, page
+    return (queryset.count() if skip else 0), page
@@ -1,6 +1,7 @@
 
 from rest_framework import serializers
-from .models import User, Skill, HackathonExperience
+from . import memberships
+from .models import User, Skill, HackathonExperience, TeamFormationJob, UserSkill
 
 
 class SkillSerializer(serializers.ModelSerializer):
@@ -18,6 +19,26 @@ class HackathonExperienceSerializer(serializers.ModelSerializer):
         }
 
 
+class MembershipSkillsField(serializers.Field):
+    """
+    Read-only list of a user's skills of one kind, as SkillSerializer data.
+    Uses memberships prefetched by User.objects.with_skills() when present.
+    """
+
+    def __init__(self, kind, **kwargs):
+        self.kind = kind
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, user):
+        if 'skill_memberships' in getattr(user, '_prefetched_objects_cache', {}):
+            rows = user.skill_memberships.all()
+        else:
+            rows = user.skill_memberships.select_related('skill').order_by('skill__name')
+        return [{'id': row.skill_id, 'name': row.skill.name} for row in rows if row.kind == self.kind]
+
+
 class UserSerializer(serializers.ModelSerializer):
     # CORRECTED: Make username/password optional for updates
     username = serializers.CharField(required=False)
@@ -25,7 +46,8 @@ class UserSerializer(serializers.ModelSerializer):
 
     # For backward compatibility with existing fields
     skills = serializers.CharField(write_only=True, required=False)
-    my_skills = SkillSerializer(many=True, read_only=True)
+    # Same as known_skills; kept for older clients
+    my_skills = MembershipSkillsField(UserSkill.KNOWN)
 
     # Frontend compatibility fields
     knownSkills = serializers.ListField(
@@ -34,8 +56,8 @@ class UserSerializer(serializers.ModelSerializer):
     desiredSkills = serializers.ListField(
         child=serializers.CharField(), write_only=True, required=False
     )
-    known_skills = SkillSerializer(many=True, read_only=True)
-    desired_skills = SkillSerializer(many=True, read_only=True)
+    known_skills = MembershipSkillsField(UserSkill.KNOWN)
+    desired_skills = MembershipSkillsField(UserSkill.DESIRED)
 
     # Social links mapping
     linkedin = serializers.URLField(write_only=True, required=False, allow_blank=True)
@@ -149,25 +171,14 @@ class UserSerializer(serializers.ModelSerializer):
 
         print(f" SERIALIZER DEBUG - User created with ID: {user.id}")
 
-        # Handle backward compatibility skills
-        if skills_text:
-            skills_list = [s.strip().lower() for s in skills_text.split(",") if s.strip()]
-            for skill_name in skills_list:
-                skill, _ = Skill.objects.get_or_create(name=skill_name.capitalize())
-                user.my_skills.add(skill)
-
-        # Handle known skills
-        for skill_name in known_skills_list:
-            if skill_name.strip():
-                skill, _ = Skill.objects.get_or_create(name=skill_name.strip().capitalize())
-                user.known_skills.add(skill)
-                user.my_skills.add(skill)  # Also add to my_skills for backward compatibility
+        # Known skills, including the comma-separated backward compatibility field
+        known_names = skills_text.split(",") + known_skills_list
+        if memberships.normalize(known_names):
+            memberships.set_skills(user.id, UserSkill.KNOWN, known_names)
 
         # Handle desired skills
-        for skill_name in desired_skills_list:
-            if skill_name.strip():
-                skill, _ = Skill.objects.get_or_create(name=skill_name.strip().capitalize())
-                user.desired_skills.add(skill)
+        if memberships.normalize(desired_skills_list):
+            memberships.set_skills(user.id, UserSkill.DESIRED, desired_skills_list)
 
         # CORRECTED: Handle hackathon experiences
         experiences_created = 0
@@ -243,20 +254,10 @@ class UserSerializer(serializers.ModelSerializer):
 
         # Update skills if provided
         if known_skills_list is not None:
-            instance.known_skills.clear()
-            instance.my_skills.clear()
-            for skill_name in known_skills_list:
-                if skill_name.strip():
-                    skill, _ = Skill.objects.get_or_create(name=skill_name.strip().capitalize())
-                    instance.known_skills.add(skill)
-                    instance.my_skills.add(skill)
+            memberships.set_skills(instance.id, UserSkill.KNOWN, known_skills_list)
 
         if desired_skills_list is not None:
-            instance.desired_skills.clear()
-            for skill_name in desired_skills_list:
-                if skill_name.strip():
-                    skill, _ = Skill.objects.get_or_create(name=skill_name.strip().capitalize())
-                    instance.desired_skills.add(skill)
+            memberships.set_skills(instance.id, UserSkill.DESIRED, desired_skills_list)
 
         # Update hackathon experiences
         if hackathon_experiences_list is not None:
@@ -285,3 +286,92 @@ class UserSerializer(serializers.ModelSerializer):
             print(f" SERIALIZER DEBUG - Updated {experiences_created} hackathon experiences for user {instance.id}")
 
         return instance
+
+
+class UserBulkPatchSerializer(serializers.Serializer):
+    """
+    One partial update for PATCH /api/users/bulk/. Uses the same frontend
+    field names as UserSerializer. Skills are added/removed rather than
+    replaced; username, email and password can't be bulk edited.
+    """
+    id = serializers.IntegerField(required=False)
+
+    name = serializers.CharField(max_length=100, required=False)
+    college = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    # PositiveSmallIntegerField range
+    year = serializers.IntegerField(min_value=0, max_value=32767, required=False, allow_null=True)
+    gender = serializers.ChoiceField(choices=User.GENDER_CHOICES, required=False, allow_null=True)
+    linkedin = serializers.URLField(required=False, allow_blank=True)
+    github = serializers.URLField(required=False, allow_blank=True)
+    isBeginner = serializers.BooleanField(required=False)
+
+    addKnownSkills = serializers.ListField(child=serializers.CharField(), required=False)
+    removeKnownSkills = serializers.ListField(child=serializers.CharField(), required=False)
+    addDesiredSkills = serializers.ListField(child=serializers.CharField(), required=False)
+    removeDesiredSkills = serializers.ListField(child=serializers.CharField(), required=False)
+
+    # frontend name -> User model field
+    SCALAR_FIELDS = {
+        'name': 'name',
+        'college': 'college_name',
+        'year': 'year',
+        'gender': 'gender',
+        'linkedin': 'linkedin_url',
+        'github': 'github_url',
+        'isBeginner': 'is_beginner',
+    }
+
+    def validate_college(self, value):
+        return value.strip() or None
+
+    def scalar_changes(self):
+        """Validated scalar fields keyed by model field name."""
+        return {
+            model_field: self.validated_data[field]
+            for field, model_field in self.SCALAR_FIELDS.items()
+            if field in self.validated_data
+        }
+
+
+class UserBulkFilterSerializer(serializers.Serializer):
+    """
+    Selects the users a filter-mode bulk patch applies to. At least one
+    criterion is required so a typo can't patch every user.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    college = serializers.CharField(required=False)
+    year = serializers.IntegerField(required=False)
+    gender = serializers.ChoiceField(choices=User.GENDER_CHOICES, required=False)
+    isBeginner = serializers.BooleanField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("At least one filter is required.")
+        return attrs
+
+    def filter_queryset(self, queryset):
+        data = self.validated_data
+        if 'ids' in data:
+            queryset = queryset.filter(id__in=data['ids'])
+        if 'college' in data:
+            queryset = queryset.filter(college_name__iexact=data['college'].strip())
+        if 'year' in data:
+            queryset = queryset.filter(year=data['year'])
+        if 'gender' in data:
+            queryset = queryset.filter(gender=data['gender'])
+        if 'isBeginner' in data:
+            queryset = queryset.filter(is_beginner=data['isBeginner'])
+        return queryset
+
+
+class TeamFormationRequestSerializer(serializers.Serializer):
+    team_size = serializers.IntegerField(min_value=2, max_value=10, default=4)
+    required_skills = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    filter = UserBulkFilterSerializer(required=False)
+
+
+class TeamFormationJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TeamFormationJob
+        fields = ["id", "status", "params", "result", "error", "created_at", "started_at", "finished_at"]
+        read_only_fields = fields
@@ -0,0 +1,70 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from . import availability, changefeed, cooccurrence, lookup, memberships
+from .models import User, Skill, HackathonExperience, UserSkill
+
+
+# Change feed: record every ORM write to users, skills and experiences.
+# Bulk writes (queryset.update, bulk_update, backend.memberships) don't
+# send signals; their callers record the users themselves.
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    changefeed.record('user', [instance.id])
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    changefeed.record('user', [instance.id], deleted=True)
+
+
+@receiver(post_save, sender=Skill)
+def skill_saved(sender, instance, **kwargs):
+    changefeed.record('skill', [instance.id])
+
+
+@receiver(pre_delete, sender=Skill)
+def skill_deleting(sender, instance, **kwargs):
+    # Deleting a skill silently drops it from every user's skill lists.
+    user_ids = set(UserSkill.objects.filter(skill_id=instance.id).values_list('user_id', flat=True))
+    changefeed.record('user', user_ids)
+
+
+@receiver(post_delete, sender=Skill)
+def skill_deleted(sender, instance, **kwargs):
+    changefeed.record('skill', [instance.id], deleted=True)
+
+
+@receiver(post_save, sender=HackathonExperience)
+def experience_saved(sender, instance, **kwargs):
+    changefeed.record('experience', [instance.id])
+
+
+@receiver(post_delete, sender=HackathonExperience)
+def experience_deleted(sender, instance, **kwargs):
+    changefeed.record('experience', [instance.id], deleted=True)
+
+
+# Skill co-occurrence matrix: backend.memberships applies the deltas of
+# its writes, and a deleted skill's cells cascade away with it.
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    # The cascade deletes the user's UserSkill rows behind memberships' back.
+    cooccurrence.apply_changes(memberships.skill_sets([instance.id], UserSkill.KNOWN), {})
+
+
+# Trigram index for /api/users/lookup/ (only maintained without pg_trgm).
+
+@receiver(post_save, sender=User)
+def user_lookup_reindex(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) & set(lookup.LOOKUP_FIELDS):
+        lookup.index_users([instance.id])
+
+
+# Username/email Bloom filter for /api/users/availability/.
+
+@receiver(post_save, sender=User)
+def user_availability_remember(sender, instance, **kwargs):
+    availability.index.remember(instance)
@@ -0,0 +1,125 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import memberships, teams
+from .background import closes_connections
+from .models import User, TeamFormationJob, UserSkill
+from .search import resolve_skill_ids
+from .serializer import UserBulkFilterSerializer
+
+logger = logging.getLogger(__name__)
+
+# One job at a time per server process; the solver itself fans out to a
+# process pool.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='team-formation')
+
+ACTIVE_STATUSES = ('pending', 'running')
+
+
+def load_participants(users):
+    """(user_id, frozenset(known skill ids), is_beginner) for ``users``, in two queries."""
+    skill_sets = memberships.skill_sets(users.order_by().values('id'), UserSkill.KNOWN)
+    return [
+        (user_id, frozenset(skill_sets[user_id]), is_beginner)
+        for user_id, is_beginner in users.order_by('id').values_list('id', 'is_beginner')
+    ]
+
+
+def form_teams(team_size, required_skills=(), user_filter=None, workers=None):
+    """
+    Run the solver over all users, or the cohort matched by ``user_filter``
+    (UserBulkFilterSerializer data). Returns {'teams': [...], 'stats': {...}}.
+    """
+    users = User.objects.all()
+    if user_filter:
+        cohort = UserBulkFilterSerializer(data=user_filter)
+        cohort.is_valid(raise_exception=True)
+        users = cohort.filter_queryset(users)
+
+    required_ids, missing = resolve_skill_ids(list(required_skills))
+    participants = load_participants(users)
+    if workers is None:
+        workers = getattr(settings, 'TEAM_FORMATION_WORKERS', None)
+
+    solution = teams.solve(participants, team_size, required_ids, workers=workers)
+    stats = teams.summarize(solution, participants, required_ids)
+    stats['unknown_required_skills'] = missing
+    return {'teams': solution, 'stats': stats}
+
+
+def fail_stale_jobs():
+    """
+    Mark jobs lost to a restart as failed: running jobs whose heartbeat is
+    older than settings.TEAM_FORMATION_STALE_SECONDS, and pending jobs no
+    thread picked up in that time. Returns how many were marked.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.TEAM_FORMATION_STALE_SECONDS)
+    stale = TeamFormationJob.objects.filter(
+        Q(status='running', heartbeat_at__lt=cutoff) | Q(status='pending', created_at__lt=cutoff)
+    )
+    count = stale.update(status='failed', error='Abandoned: the server restarted before it finished', finished_at=now)
+    if count:
+        logger.warning(f"Marked {count} stale team formation job(s) as failed")
+    return count
+
+
+def active_job():
+    """The pending or running job, if any, after failing stale ones."""
+    fail_stale_jobs()
+    return TeamFormationJob.objects.filter(status__in=ACTIVE_STATUSES).first()
+
+
+def start_job(job):
+    # Only once the job row is committed, or the worker thread can't see it.
+    transaction.on_commit(lambda: _executor.submit(run_job, job.id))
+
+
+@closes_connections
+def _heartbeat(job_id, stop):
+    while not stop.wait(settings.TEAM_FORMATION_HEARTBEAT_SECONDS):
+        TeamFormationJob.objects.filter(id=job_id, status='running').update(heartbeat_at=timezone.now())
+
+
+@closes_connections
+def run_job(job_id):
+    now = timezone.now()
+    # Only a job still pending: fail_stale_jobs() may have given up on it.
+    claimed = TeamFormationJob.objects.filter(id=job_id, status='pending').update(
+        status='running', started_at=now, heartbeat_at=now
+    )
+    if not claimed:
+        return
+    params = TeamFormationJob.objects.values_list('params', flat=True).get(id=job_id)
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job_id, stop), daemon=True,
+                                 name=f'team-formation-heartbeat-{job_id}')
+    heartbeat.start()
+    outcome = {'result': None, 'error': None}
+    try:
+        outcome['result'] = form_teams(
+            params['team_size'],
+            params.get('required_skills', []),
+            params.get('filter'),
+        )
+        outcome['status'] = 'done'
+    except Exception as exc:
+        logger.exception(f"Team formation job {job_id} failed")
+        outcome['status'] = 'failed'
+        outcome['error'] = str(exc)
+    finally:
+        stop.set()
+        heartbeat.join()
+
+    # Not if it was marked failed meanwhile; that's what clients saw.
+    TeamFormationJob.objects.filter(id=job_id, status='running').update(
+        **outcome, finished_at=timezone.now()
+    )
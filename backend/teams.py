@@ -0,0 +1,179 @@
+"""
+Team formation solver.
+
+Splits a pool of participants into teams of (nearly) equal size that cover
+as many skills as possible, weighting the required skills far above the
+rest, while spreading beginners evenly across teams.
+
+This module is plain Python on purpose: shards are solved in a spawned
+process pool, and the worker processes only need to import this file.
+A participant is a tuple ``(user_id, frozenset(skill_ids), is_beginner)``.
+"""
+import heapq
+import math
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+
+# A required skill is worth this many ordinary skills.
+REQUIRED_WEIGHT = 1000
+
+
+def team_sizes(participant_count, team_size):
+    """Sizes for ceil(n / team_size) teams that differ by at most one."""
+    if not participant_count:
+        return []
+    count = math.ceil(participant_count / team_size)
+    small, extra = divmod(participant_count, count)
+    return [small + 1] * extra + [small] * (count - extra)
+
+
+def solve(participants, team_size, required=(), workers=None, shard_size=512,
+          iterations_per_member=20, seed=0):
+    """
+    Partition ``participants`` into teams. Returns a list of teams, each a
+    list of user ids.
+
+    Participants are dealt into stratified shards of about ``shard_size``
+    (so each shard gets a similar mix of beginners and skill counts), every
+    shard is solved independently with greedy assignment plus swap-based
+    local search, and shards run in parallel on ``workers`` processes
+    (None = CPU count, 1 = in this process).
+    """
+    sizes = team_sizes(len(participants), team_size)
+    if not sizes:
+        return []
+
+    shards = _make_shards(participants, sizes, max(team_size, shard_size))
+    jobs = [
+        (members, shard_sizes, frozenset(required), iterations_per_member, seed + index)
+        for index, (members, shard_sizes) in enumerate(shards)
+    ]
+
+    if workers == 1 or len(jobs) == 1:
+        results = map(solve_shard, jobs)
+        return [team for teams in results for team in teams]
+
+    # spawn, not fork: this may run from a thread inside a server process.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+        return [team for teams in pool.map(solve_shard, jobs) for team in teams]
+
+
+def _make_shards(participants, sizes, shard_size):
+    teams_per_shard = max(1, shard_size // max(sizes))
+    shard_sizes = [sizes[i:i + teams_per_shard] for i in range(0, len(sizes), teams_per_shard)]
+    capacities = [sum(block) for block in shard_sizes]
+
+    # Deal participants in a beginner/skill-count order, each to the shard
+    # that is least full relative to its capacity, so every shard (including
+    # a smaller last one) sees the same mix.
+    ordered = sorted(participants, key=lambda p: (p[2], -len(p[1]), p[0]))
+    members = [[] for _ in capacities]
+    heap = [(0.0, shard) for shard in range(len(capacities))]
+    for participant in ordered:
+        _, shard = heapq.heappop(heap)
+        members[shard].append(participant)
+        if len(members[shard]) < capacities[shard]:
+            heapq.heappush(heap, (len(members[shard]) / capacities[shard], shard))
+
+    return list(zip(members, shard_sizes))
+
+
+def _weight(skill, required):
+    return REQUIRED_WEIGHT if skill in required else 1
+
+
+def _gain(covered, skills, required):
+    return sum(_weight(skill, required) for skill in skills if not covered[skill])
+
+
+def _swap_delta(covered, remove, add, required):
+    delta = 0
+    for skill in remove | add:
+        before = covered[skill] > 0
+        after = covered[skill] - (skill in remove) + (skill in add) > 0
+        if before != after:
+            delta += _weight(skill, required) if after else -_weight(skill, required)
+    return delta
+
+
+def solve_shard(job):
+    """Greedy assignment + local search for one shard."""
+    members, sizes, required, iterations_per_member, seed = job
+    rng = random.Random(seed)
+    teams = [[] for _ in sizes]
+    covered = [Counter() for _ in sizes]
+
+    def place(team, participant):
+        teams[team].append(participant)
+        covered[team].update(participant[1])
+
+    # Beginners first, dealt round-robin so they end up evenly spread.
+    beginners = [p for p in members if p[2]]
+    others = [p for p in members if not p[2]]
+    team = 0
+    for participant in beginners:
+        while len(teams[team]) >= sizes[team]:
+            team = (team + 1) % len(sizes)
+        place(team, participant)
+        team = (team + 1) % len(sizes)
+
+    # Then everyone else, most valuable first, into the open team they add
+    # the most coverage to (emptiest team on ties).
+    others.sort(key=lambda p: (-_gain(Counter(), p[1], required), p[0]))
+    for participant in others:
+        best = max(
+            (t for t in range(len(sizes)) if len(teams[t]) < sizes[t]),
+            key=lambda t: (_gain(covered[t], participant[1], required), -len(teams[t]))
+        )
+        place(best, participant)
+
+    # Local search: swap two members with the same beginner status between
+    # random teams whenever that increases total coverage.
+    if len(teams) > 1:
+        for _ in range(iterations_per_member * len(members)):
+            a, b = rng.sample(range(len(teams)), 2)
+            if not teams[a] or not teams[b]:
+                continue
+            i = rng.randrange(len(teams[a]))
+            x = teams[a][i]
+            candidates = [j for j, y in enumerate(teams[b]) if y[2] == x[2]]
+            if not candidates:
+                continue
+            j = rng.choice(candidates)
+            y = teams[b][j]
+            delta = (_swap_delta(covered[a], x[1], y[1], required)
+                     + _swap_delta(covered[b], y[1], x[1], required))
+            if delta > 0:
+                teams[a][i], teams[b][j] = y, x
+                covered[a].subtract(x[1])
+                covered[a].update(y[1])
+                covered[b].subtract(y[1])
+                covered[b].update(x[1])
+
+    return [[participant[0] for participant in team] for team in teams]
+
+
+def summarize(teams, participants, required=()):
+    """Coverage and beginner-spread statistics for a solution."""
+    by_id = {p[0]: p for p in participants}
+    required = frozenset(required)
+    covered_required, covered_skills, beginners = [], [], []
+    for team in teams:
+        skills = set().union(*(by_id[user_id][1] for user_id in team)) if team else set()
+        covered_required.append(len(skills & required))
+        covered_skills.append(len(skills))
+        beginners.append(sum(1 for user_id in team if by_id[user_id][2]))
+
+    count = len(teams) or 1
+    return {
+        'teams': len(teams),
+        'participants': sum(len(team) for team in teams),
+        'required_skills': len(required),
+        'teams_fully_covering_required': sum(1 for c in covered_required if c == len(required)),
+        'mean_required_covered': round(sum(covered_required) / count, 3),
+        'mean_skills_covered': round(sum(covered_skills) / count, 3),
+        'beginners_per_team': {'min': min(beginners, default=0), 'max': max(beginners, default=0)},
+    }
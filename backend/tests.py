@@ -1,3 +1,819 @@
-from django.test import TestCase
+import importlib
+import threading
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ByteBrigade_Backend import routers
+
+from . import availability, cooccurrence, lookup, memberships, team_jobs, teams
+from .admission import DEFAULT_GATE, AdmissionGate, LoginThrottle, ServiceOverloaded, TokenBucketThrottle
+from .models import ChangeLogEntry, Skill, SkillCooccurrence, TeamFormationJob, User, UserSkill
+
+
+def make_user(username, **fields):
+    fields = {'name': username.title(), 'email': f"{username}@example.com", **fields}
+    return User.objects.create(username=username, **fields)
+
+
+def matrix():
+    return {
+        (a, b): count
+        for a, b, count in SkillCooccurrence.objects.values_list('skill_a_id', 'skill_b_id', 'count')
+    }
+
+
+class UserSearchTests(TestCase):
+
+    def setUp(self):
+        self.alice = make_user('alice')
+        self.bob = make_user('bob', is_beginner=True)
+        self.carol = make_user('carol')
+        self.dave = make_user('dave')
+        self.erin = make_user('erin')
+        for user, known, desired in [
+            (self.alice, ['Python', 'Django', 'React'], []),
+            (self.bob, ['Python', 'Django'], ['React']),
+            (self.carol, ['Python'], ['Django', 'React']),
+            (self.dave, ['React'], []),
+        ]:
+            memberships.set_skills(user.id, UserSkill.KNOWN, known)
+            memberships.set_skills(user.id, UserSkill.DESIRED, desired)
+
+    def search(self, **params):
+        return self.client.get('/api/search/', params)
+
+    def ranking(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [(user['id'], user['matched_skills'], user['wanted_skills']) for user in response.data]
+
+    def test_any_ranks_by_matched_then_wanted(self):
+        response = self.search(skills='python,DJANGO,react', mode='any')
+        self.assertEqual(self.ranking(response), [
+            (self.alice.id, 3, 0), (self.bob.id, 2, 1), (self.carol.id, 1, 2), (self.dave.id, 1, 0),
+        ])
+        self.assertEqual(response['X-Total-Count'], '4')
+
+    def test_all_requires_every_skill(self):
+        self.assertCountEqual(self.ranking(self.search(skills='python,django', mode='all')),
+                              [(self.alice.id, 2, 0), (self.bob.id, 2, 0)])
+        self.assertEqual(self.ranking(self.search(skills='python,django,react')), [(self.alice.id, 3, 0)])
+
+    def test_unknown_skill(self):
+        response = self.search(skills='python,cobol', mode='all')
+        self.assertEqual(response.data, [])
+        self.assertEqual(response['X-Total-Count'], '0')
+        self.assertEqual(len(self.search(skills='python,cobol', mode='any').data), 3)
+
+    def test_exclude_beginners(self):
+        ranking = self.ranking(self.search(skills='python,django,react', mode='any', include_beginner='false'))
+        self.assertEqual([user_id for user_id, _, _ in ranking], [self.alice.id, self.carol.id, self.dave.id])
+
+    def test_paging(self):
+        response = self.search(skills='python,django,react', mode='any', skip=1, limit=2)
+        self.assertEqual([user_id for user_id, _, _ in self.ranking(response)], [self.bob.id, self.carol.id])
+        self.assertEqual(response['X-Total-Count'], '4')
+
+        response = self.search(skills='python,django,react', mode='any', skip=10)
+        self.assertEqual(response.data, [])
+        self.assertEqual(response['X-Total-Count'], '4')
+
+    def test_without_skills(self):
+        response = self.search(include_beginner='false', limit=2)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(response['X-Total-Count'], '4')
+
+    def test_bad_paging_parameters(self):
+        for params in ({'limit': 0}, {'limit': 'x'}, {'skip': -1}):
+            response = self.search(skills='python', **params)
+            self.assertEqual(response.status_code, 400, params)
+        self.assertEqual(self.search(skills='python', mode='some').status_code, 400)
+        self.assertEqual(len(self.search(skills='python', limit=10 ** 7).data), 3)
+
+
+class UserSearchFacetsTests(TestCase):
+
+    def setUp(self):
+        for username, college, year, gender, beginner, known in [
+            ('alice', 'IIT', 2, 'female', False, ['Python', 'Django']),
+            ('bob', 'IIT', 3, 'male', True, ['Python']),
+            ('carol', 'NIT', 2, 'female', False, ['Python', 'React']),
+            ('dave', 'IIT', None, None, False, ['React']),
+            ('erin', 'BITS', 1, 'other', True, []),
+        ]:
+            user = make_user(username, college_name=college, year=year, gender=gender, is_beginner=beginner)
+            memberships.set_skills(user.id, UserSkill.KNOWN, known)
+
+    def facets(self, **params):
+        response = self.client.get('/api/search/facets/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def counts(self, rows, key='value'):
+        return [(row[key], row['count']) for row in rows]
+
+    def test_all_users(self):
+        facets = self.facets()
+        self.assertEqual(facets['total'], 5)
+        self.assertEqual(self.counts(facets['college_name']), [('IIT', 3), ('BITS', 1), ('NIT', 1)])
+        self.assertEqual(dict(self.counts(facets['year'])), {2: 2, 3: 1, 1: 1, None: 1})
+        self.assertEqual(dict(self.counts(facets['is_beginner'])), {False: 3, True: 2})
+        self.assertEqual(self.counts(facets['skills'], 'name'), [('Python', 3), ('React', 2), ('Django', 1)])
+
+    def test_filtered_like_search(self):
+        for params in ({'skills': 'python,react', 'mode': 'any'},
+                       {'skills': 'python', 'include_beginner': 'false'},
+                       {'skills': 'python,cobol', 'mode': 'all'}):
+            facets = self.facets(**params)
+            search = self.client.get('/api/search/', params)
+            self.assertEqual(facets['total'], int(search['X-Total-Count']), params)
+
+        facets = self.facets(skills='python,react', mode='all')
+        self.assertEqual(facets['total'], 1)
+        self.assertEqual(self.counts(facets['gender']), [('female', 1)])
+
+    def test_facet_limit(self):
+        facets = self.facets(facet_limit=1)
+        self.assertEqual(self.counts(facets['college_name']), [('IIT', 3)])
+        self.assertEqual(self.counts(facets['skills'], 'name'), [('Python', 3)])
+
+    def test_bad_parameters(self):
+        for params in ({'facet_limit': 0}, {'facet_limit': 'x'}, {'mode': 'some'}):
+            self.assertEqual(self.client.get('/api/search/facets/', params).status_code, 400, params)
+
+
+@override_settings(CHANGEFEED_SETTLE_SECONDS=0)
+class ChangeFeedTests(TestCase):
+
+    def setUp(self):
+        self.token = self.client.get('/api/changes/').data['next']
+
+    def poll(self, **params):
+        response = self.client.get('/api/changes/', {'since': self.token, **params})
+        self.assertEqual(response.status_code, 200)
+        self.token = response.data['next']
+        return response.data
+
+    def test_created_updated_and_deleted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            alice = make_user('alice')
+            bob = make_user('bob')
+        changes = self.poll()
+        self.assertEqual({user['id'] for user in changes['users']}, {alice.id, bob.id})
+        self.assertEqual(changes['deleted']['users'], [])
+        self.assertEqual(self.poll()['users'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            alice.name = 'Alice Liddell'
+            alice.save()
+            bob_id = bob.id
+            bob.delete()
+        changes = self.poll()
+        self.assertEqual([user['name'] for user in changes['users']], ['Alice Liddell'])
+        self.assertEqual(changes['deleted']['users'], [bob_id])
+
+    def test_rolled_back_write_leaves_no_entry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    make_user('alice')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertFalse(ChangeLogEntry.objects.exists())
+        changes = self.poll()
+        self.assertEqual(changes['users'], [])
+
+    def test_pages_with_has_more(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            users = [make_user(f'user{i}') for i in range(3)]
+        seen = []
+        while True:
+            changes = self.poll(limit=2)
+            seen.extend(user['id'] for user in changes['users'])
+            if not changes['has_more']:
+                break
+        self.assertEqual(sorted(seen), sorted(user.id for user in users))
+
+    def test_deleting_a_skill_changes_its_users(self):
+        alice = make_user('alice')
+        with self.captureOnCommitCallbacks(execute=True):
+            memberships.set_skills(alice.id, UserSkill.KNOWN, ['Python'])
+        self.poll()
+
+        skill = Skill.objects.get(name='Python')
+        skill_id = skill.id
+        with self.captureOnCommitCallbacks(execute=True):
+            skill.delete()
+        changes = self.poll()
+        self.assertEqual(changes['deleted']['skills'], [skill_id])
+        self.assertEqual([user['id'] for user in changes['users']], [alice.id])
+
+    def test_settle_window_holds_back_new_entries(self):
+        with self.settings(CHANGEFEED_SETTLE_SECONDS=60):
+            with self.captureOnCommitCallbacks(execute=True):
+                make_user('alice')
+            token = self.token
+            self.assertEqual(self.poll()['users'], [])
+            self.assertEqual(self.token, token)
+
+    def test_bad_parameters(self):
+        for params in ({'since': 'x'}, {'since': 0, 'limit': -5}, {'since': 0, 'limit': 'x'}):
+            self.assertEqual(self.client.get('/api/changes/', params).status_code, 400, params)
+
+
+class TeamFormationTests(TestCase):
+
+    def participants(self):
+        # 8 know Python, 8 don't; every fourth one is a beginner.
+        return [(i, frozenset({1, 10 + i % 3} if i < 8 else {2, 10 + i % 5}), i % 4 == 0) for i in range(16)]
+
+    def test_team_sizes(self):
+        self.assertEqual(teams.team_sizes(10, 4), [4, 3, 3])
+        self.assertEqual(teams.team_sizes(8, 4), [4, 4])
+        self.assertEqual(teams.team_sizes(0, 4), [])
+
+    def test_solve(self):
+        participants = self.participants()
+        solution = teams.solve(participants, 4, required={1}, workers=1, shard_size=8)
+        self.assertEqual(sorted(len(team) for team in solution), [4, 4, 4, 4])
+        self.assertEqual(sorted(user_id for team in solution for user_id in team), list(range(16)))
+
+        stats = teams.summarize(solution, participants, {1})
+        self.assertEqual(stats['teams_fully_covering_required'], 4)
+        self.assertEqual(stats['beginners_per_team'], {'min': 1, 'max': 1})
+
+    def test_form_teams_for_a_cohort(self):
+        for i in range(6):
+            user = make_user(f'user{i}', college_name='IIT' if i < 4 else 'NIT')
+            memberships.set_skills(user.id, UserSkill.KNOWN, ['Python'] if i % 2 else ['React'])
+        result = team_jobs.form_teams(2, ['python', 'cobol'], {'college': 'IIT'}, workers=1)
+        self.assertEqual(result['stats']['participants'], 4)
+        self.assertEqual(result['stats']['teams_fully_covering_required'], 2)
+        self.assertEqual(result['stats']['unknown_required_skills'], ['cobol'])
+
+
+@override_settings(TEAM_FORMATION_WORKERS=1)
+class TeamFormationJobTests(TransactionTestCase):
+    """The job runs on team_jobs' executor thread, so rows must be committed."""
+
+    def setUp(self):
+        for i in range(4):
+            make_user(f'user{i}')
+
+    def create(self, **data):
+        return self.client.post('/api/teams/jobs/', {'team_size': 2, **data}, content_type='application/json')
+
+    def wait_until_finished(self, job_id):
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            response = self.client.get(f'/api/teams/jobs/{job_id}/')
+            if response.data['status'] not in team_jobs.ACTIVE_STATUSES:
+                return response.data
+            time.sleep(0.02)
+        self.fail(f"job {job_id} didn't finish")
+
+    def test_job_runs(self):
+        response = self.create()
+        self.assertEqual(response.status_code, 202)
+        job = self.wait_until_finished(response.data['id'])
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(len(job['result']['teams']), 2)
+        self.assertIsNotNone(job['started_at'])
+
+    def test_invalid_request(self):
+        self.assertEqual(self.create(team_size=1).status_code, 400)
+        self.assertFalse(TeamFormationJob.objects.exists())
+
+    def test_one_job_at_a_time(self):
+        now = timezone.now()
+        running = TeamFormationJob.objects.create(status='running', params={'team_size': 2},
+                                                  started_at=now, heartbeat_at=now)
+        response = self.create()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['job']['id'], running.id)
+
+    def test_lost_jobs_fail(self):
+        # Started long ago but still heartbeating: keeps running.
+        long_ago = timezone.now() - timedelta(hours=1)
+        alive = TeamFormationJob.objects.create(status='running', params={'team_size': 2}, created_at=long_ago,
+                                                started_at=long_ago, heartbeat_at=timezone.now())
+        self.assertEqual(team_jobs.fail_stale_jobs(), 0)
+
+        alive.heartbeat_at = long_ago
+        alive.save()
+        TeamFormationJob.objects.create(params={'team_size': 2}, created_at=long_ago)
+        self.assertEqual(team_jobs.fail_stale_jobs(), 2)
+        self.assertEqual(self.create().status_code, 202)
+
+    def test_failed_job_is_not_run_or_overwritten(self):
+        job = TeamFormationJob.objects.create(status='failed', params={'team_size': 2})
+        team_jobs.run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.started_at), ('failed', None, None))
+
+
+class UserLookupTests(TestCase):
+
+    def setUp(self):
+        self.ankit = make_user('ankit', name='Ankit Sharma', college_name='IIT Delhi')
+        self.ankita = make_user('arao', name='Ankita Rao', college_name='NIT Trichy')
+        self.bob = make_user('bob99', name='Bob Stone', college_name='Ankur Institute')
+
+    def lookup(self, q, **params):
+        response = self.client.get('/api/users/lookup/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [user['id'] for user in response.data]
+
+    def test_trigrams(self):
+        self.assertEqual(lookup.trigrams('Ankit'), {'  a', ' an', 'ank', 'nki', 'kit', 'it '})
+        self.assertEqual(lookup.trigrams('Ank', prefix=True), {'  a', ' an', 'ank'})
+        # Migration 0008 carries its own copy; both must index alike.
+        migration = importlib.import_module('backend.migrations.0008_user_trigram_lookup')
+        self.assertEqual(migration.LOOKUP_FIELDS, lookup.LOOKUP_FIELDS)
+        for text in ('Ankit Sharma', 'IIT-Delhi 2nd yr', '', None):
+            self.assertEqual(migration.trigrams(text), lookup.trigrams(text))
+
+    def test_prefix_and_ranking(self):
+        # Fuzzy: Ankur shares 'ank' and may trail, but Ankit ranks above Ankita.
+        self.assertEqual(self.lookup('ankit')[:2], [self.ankit.id, self.ankita.id])
+        self.assertEqual(set(self.lookup('ank')), {self.ankit.id, self.ankita.id, self.bob.id})
+        self.assertEqual(self.lookup('trichy'), [self.ankita.id])
+        self.assertEqual(self.lookup('bob9'), [self.bob.id])
+        self.assertEqual(self.lookup('zzzz'), [])
+
+    def test_follows_renames(self):
+        self.bob.name = 'Robert Stone'
+        self.bob.save()
+        self.assertEqual(self.lookup('robert'), [self.bob.id])
+
+        self.client.patch('/api/users/bulk/', [{'id': self.ankita.id, 'name': 'Priya Rao'}],
+                          content_type='application/json')
+        self.assertEqual(self.lookup('priya'), [self.ankita.id])
+        self.assertNotIn(self.ankita.id, self.lookup('ankita'))
+
+    def test_limits(self):
+        self.assertEqual(len(self.lookup('ank', limit=1)), 1)
+        self.assertEqual(self.lookup('a'), [])
+        for limit in ('x', 0):
+            response = self.client.get('/api/users/lookup/', {'q': 'ank', 'limit': limit})
+            self.assertEqual(response.status_code, 400)
+
+
+class CooccurrenceTests(TestCase):
+    """The incrementally maintained matrix always equals a full rebuild."""
+
+    def setUp(self):
+        self.alice = make_user('alice', college_name='IIT')
+        self.bob = make_user('bob', college_name='IIT')
+        self.carol = make_user('carol', college_name='NIT')
+        memberships.set_skills(self.alice.id, UserSkill.KNOWN, ['python', 'django', 'react'])
+        memberships.set_skills(self.bob.id, UserSkill.KNOWN, ['python', 'react'])
+        memberships.set_skills(self.carol.id, UserSkill.KNOWN, ['python'])
+
+    def assertMatchesRebuild(self):
+        incremental = matrix()
+        cooccurrence.rebuild()
+        self.assertEqual(incremental, matrix())
+
+    def test_set_skills(self):
+        self.assertMatchesRebuild()
+        memberships.set_skills(self.alice.id, UserSkill.KNOWN, ['Python', 'Go'])
+        memberships.set_skills(self.bob.id, UserSkill.KNOWN, [])
+        self.assertMatchesRebuild()
+
+    def test_desired_skills_are_not_counted(self):
+        before = matrix()
+        memberships.set_skills(self.carol.id, UserSkill.DESIRED, ['Rust', 'Django'])
+        self.assertEqual(before, matrix())
+
+    def test_bulk_patch(self):
+        response = self.client.patch('/api/users/bulk/', [
+            {'id': self.alice.id, 'removeKnownSkills': ['React'], 'addKnownSkills': ['Go']},
+            {'id': self.bob.id, 'addKnownSkills': ['Django', 'Go']},
+        ], content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertMatchesRebuild()
+
+        response = self.client.patch('/api/users/bulk/', {
+            'filter': {'college': 'iit'}, 'patch': {'removeKnownSkills': ['Python', 'Go']},
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertMatchesRebuild()
+
+    def test_remove_from_drifted_matrix(self):
+        # A matrix that lags the data must not go negative (500 on the CHECK).
+        SkillCooccurrence.objects.update(count=1)
+        response = self.client.patch('/api/users/bulk/', {
+            'filter': {'ids': [self.alice.id, self.bob.id]}, 'patch': {'removeKnownSkills': ['Python']},
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(SkillCooccurrence.objects.filter(count__lt=0).exists())
+
+    def test_user_delete(self):
+        self.bob.delete()
+        self.assertMatchesRebuild()
+
+    def test_skill_delete(self):
+        Skill.objects.get(name='React').delete()
+        self.assertMatchesRebuild()
+
+
+class UserSkillsApiTests(TestCase):
+    """my_skills is a read-only alias of known_skills since both became UserSkill rows."""
+
+    def names(self, data, field):
+        return [skill['name'] for skill in data[field]]
+
+    def test_create_merges_skills_text_and_known_skills(self):
+        response = self.client.post('/api/users/', {
+            'username': 'alice', 'password': 'secret123', 'name': 'Alice', 'email': 'alice@example.com',
+            'skills': 'python, go', 'knownSkills': ['React', 'python'], 'desiredSkills': ['rust'],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        user = self.client.get(f"/api/users/{response.data['id']}/").data
+        self.assertEqual(self.names(user, 'known_skills'), ['Go', 'Python', 'React'])
+        self.assertEqual(user['my_skills'], user['known_skills'])
+        self.assertEqual(self.names(user, 'desired_skills'), ['Rust'])
+
+    def test_skills_endpoint_replaces_both_kinds(self):
+        alice = make_user('alice')
+        memberships.set_skills(alice.id, UserSkill.KNOWN, ['Python', 'Go'])
+        response = self.client.put(f'/api/users/{alice.id}/skills/', {
+            'knownSkills': ['go', 'Django'], 'desiredSkills': ['Python'],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        user = response.data['user']
+        self.assertEqual(self.names(user, 'known_skills'), ['Django', 'Go'])
+        self.assertEqual(self.names(user, 'my_skills'), ['Django', 'Go'])
+        self.assertEqual(self.names(user, 'desired_skills'), ['Python'])
+
+    def test_my_skills_is_read_only(self):
+        alice = make_user('alice')
+        self.client.patch(f'/api/users/{alice.id}/', {'my_skills': [{'name': 'Python'}]},
+                          content_type='application/json')
+        self.assertFalse(UserSkill.objects.filter(user=alice).exists())
+
+
+class UserSkillMigrationTests(TransactionTestCase):
+    """Migration 0009 copies the three skill M2Ms into UserSkill and back."""
+    before = [('backend', '0008_user_trigram_lookup')]
+    after = [('backend', '0009_userskill')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_copy_and_reverse(self):
+        apps = self.migrate(self.before)
+        User, Skill = apps.get_model('backend', 'User'), apps.get_model('backend', 'Skill')
+        python, go, rust = (Skill.objects.create(name=name) for name in ('Python', 'Go', 'Rust'))
+        alice = User.objects.create(username='alice', name='Alice', email='alice@example.com')
+        bob = User.objects.create(username='bob', name='Bob', email='bob@example.com')
+        alice.known_skills.add(python)
+        alice.my_skills.add(python, go)
+        alice.desired_skills.add(rust)
+        bob.my_skills.add(go)
+
+        apps = self.migrate(self.after)
+        UserSkill = apps.get_model('backend', 'UserSkill')
+        SkillCooccurrence = apps.get_model('backend', 'SkillCooccurrence')
+        self.assertEqual(set(UserSkill.objects.values_list('user_id', 'skill_id', 'kind')), {
+            (alice.id, python.id, 'known'), (alice.id, go.id, 'known'),
+            (alice.id, rust.id, 'desired'), (bob.id, go.id, 'known'),
+        })
+        # The matrix counts known_skills UNION my_skills.
+        cells = {(a, b): count for a, b, count in SkillCooccurrence.objects.values_list('skill_a_id', 'skill_b_id', 'count')}
+        pair = tuple(sorted((python.id, go.id)))
+        self.assertEqual(cells, {(python.id, python.id): 1, (go.id, go.id): 2, pair: 1})
+
+        apps = self.migrate(self.before)
+        User = apps.get_model('backend', 'User')
+        alice = User.objects.get(id=alice.id)
+        self.assertEqual(set(alice.known_skills.values_list('name', flat=True)), {'Python', 'Go'})
+        self.assertEqual(set(alice.my_skills.values_list('name', flat=True)), {'Python', 'Go'})
+        self.assertEqual(set(alice.desired_skills.values_list('name', flat=True)), {'Rust'})
+
+
+class UserBulkPatchTests(TestCase):
+
+    def setUp(self):
+        self.alice = make_user('alice', college_name='IIT', year=2)
+        self.bob = make_user('bob', college_name='IIT', year=3)
+        self.carol = make_user('carol', college_name='NIT', year=2)
+
+    def patch(self, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch('/api/users/bulk/', data, content_type='application/json')
+
+    def test_list_mode(self):
+        response = self.patch([
+            {'id': self.alice.id, 'college': ' MIT ', 'isBeginner': True, 'addKnownSkills': ['python']},
+            {'id': self.bob.id, 'year': 4, 'addDesiredSkills': ['Rust']},
+            {'id': 999999, 'year': 1},
+            {'year': 1},
+            {'id': self.carol.id, 'year': 40000},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], [self.alice.id, self.bob.id])
+        self.assertEqual(sorted(error['index'] for error in response.data['errors']), [2, 3, 4])
+
+        self.alice.refresh_from_db()
+        self.assertEqual((self.alice.college_name, self.alice.is_beginner), ('MIT', True))
+        self.assertEqual(User.objects.get(id=self.bob.id).year, 4)
+        self.assertEqual(User.objects.get(id=self.carol.id).year, 2)
+        self.assertEqual(memberships.skill_sets([self.alice.id], UserSkill.KNOWN)[self.alice.id],
+                         {Skill.objects.get(name='Python').id})
+        self.assertEqual(memberships.skill_sets([self.bob.id], UserSkill.DESIRED)[self.bob.id],
+                         {Skill.objects.get(name='Rust').id})
+        self.assertEqual(
+            set(ChangeLogEntry.objects.filter(kind='user').values_list('object_id', flat=True)),
+            {self.alice.id, self.bob.id},
+        )
+
+    def test_filter_mode(self):
+        response = self.patch({'filter': {'college': 'iit', 'year': 2},
+                               'patch': {'isBeginner': True, 'addKnownSkills': ['Go']}})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], [self.alice.id])
+        self.assertEqual(
+            set(User.objects.filter(is_beginner=True).values_list('id', flat=True)), {self.alice.id})
+        self.assertEqual(UserSkill.objects.filter(kind=UserSkill.KNOWN).count(), 1)
+
+    def test_filter_mode_rejects_empty_filter(self):
+        response = self.patch({'filter': {}, 'patch': {'isBeginner': True}})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.filter(is_beginner=True).exists())
+
+    def test_invalid_body(self):
+        self.assertEqual(self.patch({'isBeginner': True}).status_code, 400)
+
+
+class AdmissionGateTests(TestCase):
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.001)
+
+    def test_queues_then_rejects(self):
+        gate = AdmissionGate('test', max_concurrent=1, max_queue=1, queue_timeout=5.0, retry_after=3)
+        gate.acquire()
+
+        admitted = threading.Event()
+
+        def queued_request():
+            gate.acquire()
+            admitted.set()
+            gate.release()
+
+        thread = threading.Thread(target=queued_request)
+        thread.start()
+        self.wait_for(lambda: gate.queued == 1)
+
+        # Slot and queue are full.
+        with self.assertRaises(ServiceOverloaded) as raised:
+            gate.acquire()
+        self.assertEqual(raised.exception.wait, 3)
+        self.assertFalse(admitted.is_set())
+
+        gate.release()
+        thread.join(5)
+        self.assertTrue(admitted.is_set())
+        self.assertEqual(gate.stats()['active'], 0)
+        self.assertEqual(gate.stats()['admitted'], 2)
+        self.assertEqual(gate.stats()['rejected_queue_full'], 1)
+
+    def test_queue_timeout(self):
+        gate = AdmissionGate('test', max_concurrent=1, max_queue=4, queue_timeout=0.05, retry_after=1)
+        gate.acquire()
+        with self.assertRaises(ServiceOverloaded):
+            gate.acquire()
+        self.assertEqual(gate.stats()['rejected_timeout'], 1)
+        self.assertEqual(gate.stats()['queued'], 0)
+
+
+class TestThrottle(TokenBucketThrottle):
+    scope = 'test'
+    _buckets = None
+
+
+@override_settings(ADMISSION_CONTROL={'test': {'bucket': {'capacity': 3, 'refill_rate': 0.5}}})
+class TokenBucketThrottleTests(TestCase):
+
+    def setUp(self):
+        TestThrottle._buckets = {}
+        LoginThrottle._buckets = {}
+
+    def requests(self, throttle, count, **meta):
+        request = type('Request', (), {'META': {'REMOTE_ADDR': '10.0.0.1', **meta}})()
+        return [throttle.allow_request(request, None) for _ in range(count)]
+
+    def test_burst_then_reject(self):
+        throttle = TestThrottle()
+        self.assertEqual(self.requests(throttle, 4), [True, True, True, False])
+        self.assertEqual(throttle.wait(), 2)
+        # Buckets are per client.
+        self.assertEqual(self.requests(throttle, 1, REMOTE_ADDR='10.0.0.2'), [True])
+
+    def test_refill(self):
+        throttle = TestThrottle()
+        self.requests(throttle, 3)
+        key = ('client', '10.0.0.1')
+        tokens, updated = TestThrottle._buckets[key]
+        TestThrottle._buckets[key] = (tokens, updated - 2)
+        self.assertEqual(self.requests(throttle, 2), [True, False])
+
+    def login(self, username, **extra):
+        return self.client.post('/api/login/', {'username': username, 'password': 'wrong'},
+                                content_type='application/json', **extra).status_code
+
+    def test_login_ignores_forwarded_for(self):
+        codes = [self.login(f'user{i}', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}') for i in range(6)]
+        self.assertEqual(codes, [401] * 5 + [429])
+
+    def test_login_limits_each_client_across_usernames(self):
+        codes = [self.login(f'user{i}') for i in range(6)]
+        self.assertEqual(codes, [401] * 5 + [429])
+        self.assertEqual(self.login('user9', REMOTE_ADDR='10.0.0.2'), 401)
+
+    def test_login_limits_each_account_across_clients(self):
+        codes = [self.login('alice', REMOTE_ADDR=f'10.0.1.{i}') for i in range(6)]
+        self.assertEqual(codes, [401] * 5 + [429])
+        # The refused attempt took no token from its client's bucket.
+        self.assertEqual(self.login('bob', REMOTE_ADDR='10.0.1.5'), 401)
+
+
+class GateSizingTests(TestCase):
+
+    def test_gates_leave_threads_free(self):
+        from ByteBrigade_Backend import gunicorn_conf
+
+        held = sum(
+            config.get('max_concurrent', DEFAULT_GATE['max_concurrent'])
+            + config.get('max_queue', DEFAULT_GATE['max_queue'])
+            for config in settings.ADMISSION_CONTROL.values()
+        )
+        # At least two threads stay free for ungated requests.
+        self.assertLessEqual(held, gunicorn_conf.threads - 2)
+
+
+class BloomFilterTests(TestCase):
+
+    def test_no_false_negatives(self):
+        bloom = availability.BloomFilter(capacity=5000, error_rate=0.01)
+        items = [f"username:user{i}" for i in range(5000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+
+        false_positives = sum(f"username:other{i}" in bloom for i in range(20000))
+        self.assertLess(false_positives / 20000, 0.02)
+
+    def test_count_ignores_repeats(self):
+        bloom = availability.BloomFilter(capacity=100, error_rate=0.01)
+        self.assertTrue(bloom.add('username:alice'))
+        self.assertFalse(bloom.add('username:alice'))
+        bloom.add('username:bob')
+        self.assertEqual(bloom.count, 2)
+
+    @override_settings(AVAILABILITY_BLOOM_MIN_CAPACITY=10)
+    def test_resaving_users_does_not_fill_the_filter(self):
+        alice = make_user('alice')
+        index = availability.AvailabilityIndex()
+        index.load()
+        count = index._filter.count
+        for _ in range(50):
+            index.remember(alice)
+        self.assertEqual(index._filter.count, count)
+        with self.captureOnCommitCallbacks(execute=True):
+            alice.save()
+        index.refresh()
+        self.assertEqual(index._filter.count, count)
+        self.assertFalse(index._loading)
+
+    @override_settings(AVAILABILITY_BLOOM_MIN_CAPACITY=100)
+    def test_index_sees_users_saved_after_load(self):
+        index = availability.AvailabilityIndex()
+        make_user('alice')
+        index.load()
+        with self.settings(AVAILABILITY_REFRESH_SECONDS=3600):
+            self.assertFalse(index.is_taken('username', 'bob'))
+            bob = make_user('bob')
+            index.remember(bob)
+            self.assertTrue(index.is_taken('username', 'alice'))
+            self.assertTrue(index.is_taken('username', 'bob'))
+            self.assertTrue(index.is_taken('email', 'bob@example.com'))
+
+
+@skipUnless(settings.REPLICA_DATABASES, "needs a replica, e.g. DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3")
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Primary plus one replica. Run with two local databases:
+
+        DATABASE_URL=sqlite:///db.sqlite3 DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 \\
+            python manage.py test backend
+
+    The test replica mirrors the primary through its own connection, so
+    queries can be counted per alias.
+    """
+    databases = {'default', *settings.REPLICA_DATABASES}
+
+    def setUp(self):
+        self.replica = settings.REPLICA_DATABASES[0]
+        override = override_settings(REPLICA_DATABASES=[self.replica])
+        override.enable()
+        self.addCleanup(override.disable)
+        Skill.objects.create(name='Python')
+
+    def count_queries(self, method, path, **kwargs):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[self.replica]) as replica:
+            response = getattr(self.client, method)(path, **kwargs)
+        return response, len(primary), len(replica)
+
+    def test_reads_go_to_the_replica(self):
+        response, primary, replica = self.count_queries('get', '/api/skills/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_write_pins_reads_to_the_primary(self):
+        response, primary, replica = self.count_queries(
+            'post', '/api/skills/', data={'name': 'Rust'}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(replica, 0)
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+
+        # The test client sends the cookie back.
+        response, primary, replica = self.count_queries('get', '/api/skills/')
+        self.assertContains(response, 'Rust')
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    @override_settings(SECURE_PROXY_SSL_HEADER=('HTTP_X_FORWARDED_PROTO', 'https'))
+    def test_pin_cookie_is_cross_site_behind_a_tls_proxy(self):
+        response = self.client.post('/api/skills/', data={'name': 'Go'}, content_type='application/json',
+                                    HTTP_X_FORWARDED_PROTO='https')
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['samesite'], 'None')
+        self.assertTrue(cookie['secure'])
+
+
+@skipUnless(len(settings.REPLICA_DATABASES) >= 2,
+            "needs two replicas, e.g. DATABASE_REPLICA_URLS=sqlite:///replica1.sqlite3,sqlite:///replica2.sqlite3")
+class MultiReplicaRoutingTests(TransactionTestCase):
+    """
+    Primary plus two replicas (mirrors, as above). Every read of a request
+    must go to the same replica, or rows seen by one query can be missing
+    from the next.
+    """
+    databases = {'default', *settings.REPLICA_DATABASES}
+
+    def setUp(self):
+        alice = make_user('alice')
+        memberships.set_skills(alice.id, UserSkill.KNOWN, ['Python', 'Django'])
+
+    def replicas_used(self, path):
+        with ExitStack() as stack:
+            captures = {
+                alias: stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in settings.REPLICA_DATABASES
+            }
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return {alias for alias, capture in captures.items() if len(capture)}
+
+    def test_one_replica_per_request(self):
+        used = set()
+        for _ in range(20):
+            replicas = self.replicas_used('/api/search/?skills=python,django&mode=any')
+            self.assertEqual(len(replicas), 1)
+            used |= replicas
+        # Different requests still spread over the replicas.
+        self.assertEqual(used, set(settings.REPLICA_DATABASES))
+
+    def test_router_returns_the_request_replica(self):
+        token = routers.begin_request(use_replica=True)
+        try:
+            aliases = {User.objects.all().db for _ in range(50)}
+        finally:
+            state = routers.end_request(token)
+        self.assertEqual(aliases, {state.replica})
 
-# Create your tests here.
@@ -5,11 +5,20 @@ urlpatterns = [
     # Remove 'api/' from all patterns
     path('login/', api_views.LoginView.as_view(), name='login'),
     path('users/', api_views.UserListCreateView.as_view(), name='user-list-create'),
+    path('users/lookup/', api_views.UserLookupView.as_view(), name='user-lookup'),
+    path('users/availability/', api_views.UserAvailabilityView.as_view(), name='user-availability'),
+    path('users/bulk/', api_views.UserBulkUpdateView.as_view(), name='user-bulk-update'),
     path('users/<int:pk>/', api_views.UserDetailView.as_view(), name='user-detail'),
     path('users/<int:user_id>/skills/', api_views.UserUpdateSkillsView.as_view(), name='user-skills'),
     path('search/', api_views.UserSearchView.as_view(), name='user-search'),
+    path('search/facets/', api_views.UserSearchFacetsView.as_view(), name='user-search-facets'),
+    path('teams/jobs/', api_views.TeamFormationJobCreateView.as_view(), name='team-job-create'),
+    path('teams/jobs/<int:pk>/', api_views.TeamFormationJobDetailView.as_view(), name='team-job-detail'),
     path('skills/', api_views.SkillListCreateView.as_view(), name='skill-list-create'),
     path('skills/<int:pk>/', api_views.SkillDetailView.as_view(), name='skill-detail'),
+    path('skills/<int:pk>/related/', api_views.SkillRelatedView.as_view(), name='skill-related'),
+    path('changes/', api_views.ChangeFeedView.as_view(), name='change-feed'),
     path('health/', api_views.HealthCheckView.as_view(), name='health-check'),
+    path('health/admission/', api_views.AdmissionStatsView.as_view(), name='admission-stats'),
     path('debug/skills/', api_views.DebugSkillsView.as_view(), name='debug-skills'),
 ]
@@ -1,12 +1,12 @@
 from django.shortcuts import render
-from .models import User,Skill
+from .models import User,Skill,UserSkill
 from django.http import HttpResponse
 # filtering users by conditions like skills year
 def filter_user_by_skills(request):
     skill_search=request.GET.get('Skills')
     users=[]
     if skill_search:
-        users=User.objects.filter(my_skills__name__icontains=skill_search)
+        users=User.objects.filter(skill_memberships__kind=UserSkill.KNOWN, skill_memberships__skill__name__icontains=skill_search).distinct()
 
     return render(request, "search_results.html", {"users": users, "query": skill_search})
 